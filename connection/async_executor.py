@@ -0,0 +1,254 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import asyncio
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Thread
+
+from connection.base_executor import BaseExecutor
+from connection.shell_session import LocalShellSession
+from connection.tar_transfer import TarCompression, tar_source
+from test_utils.output import Output
+
+
+class AsyncBaseExecutor:
+    def __init__(self):
+        self._sync_executor = None
+
+    async def _execute(self, command, timeout):
+        raise NotImplementedError()
+
+    async def _rsync(self, src, dst, delete, timeout):
+        raise NotImplementedError()
+
+    async def _rsync_from(self, src, dst, delete, timeout):
+        raise NotImplementedError()
+
+    async def tar_to(self, src, dst, compression: TarCompression, timeout):
+        raise NotImplementedError()
+
+    async def tar_from(self, src, dst, compression: TarCompression, timeout):
+        raise NotImplementedError()
+
+    def _open_shell_session(self):
+        raise NotImplementedError()
+
+    def is_remote(self):
+        return False
+
+    def is_active(self):
+        return True
+
+    async def wait_for_connection(self, timeout: timedelta = timedelta(minutes=10)):
+        pass
+
+    def sync(self):
+        """Returns BaseExecutor executing commands of this executor."""
+        if self._sync_executor is None:
+            self._sync_executor = SyncExecutor(self)
+        return self._sync_executor
+
+    @property
+    def metrics(self):
+        return self.sync().metrics
+
+    def enable_cache(self, *args, **kwargs):
+        self.sync().enable_cache(*args, **kwargs)
+
+    def disable_cache(self):
+        self.sync().disable_cache()
+
+    async def _call(self, function, *args):
+        # commands go through BaseExecutor returned by sync() (command cache, metrics,
+        # background jobs), its blocking calls are made from the default thread pool
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def run(self, command, timeout: timedelta = timedelta(minutes=30),
+                  cacheable: bool = None):
+        return await self._call(self.sync().run, command, timeout, cacheable)
+
+    async def rsync(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+        return await self._call(self.sync().rsync, src, dst, delete, timeout)
+
+    async def rsync_from(self, src, dst, delete=False,
+                         timeout: timedelta = timedelta(seconds=30)):
+        return await self._call(self.sync().rsync_from, src, dst, delete, timeout)
+
+    async def run_in_background(self, command):
+        return await self._call(self.sync().run_in_background, command)
+
+    async def wait_cmd_finish(self, pid: int, timeout: timedelta = timedelta(minutes=30)):
+        return await self._call(self.sync().wait_cmd_finish, pid, timeout)
+
+    async def run_expect_success(self, command):
+        output = await self.run(command)
+        if output.exit_code != 0:
+            raise Exception(f"Exception occurred while trying to execute '{command}' command.\n"
+                            f"stdout: {output.stdout}\nstderr: {output.stderr}")
+        return output
+
+    async def run_expect_fail(self, command):
+        output = await self.run(command)
+        if output.exit_code == 0:
+            raise Exception(f"Command '{command}' executed properly but error was expected.\n"
+                            f"stdout: {output.stdout}\nstderr: {output.stderr}")
+        return output
+
+
+class AsyncLocalExecutor(AsyncBaseExecutor):
+    async def _execute(self, command, timeout):
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(),
+                                                    timeout.total_seconds())
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise subprocess.TimeoutExpired(command, timeout.total_seconds())
+
+        return Output(stdout, stderr, process.returncode)
+
+    def _open_shell_session(self):
+        return LocalShellSession()
+
+    async def _rsync(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+        options = []
+        if delete:
+            options.append("--delete")
+        await self.__run_process(f'rsync -r {src} {dst} {" ".join(options)}', timeout)
+
+    async def _rsync_from(self, src, dst, delete=False,
+                          timeout: timedelta = timedelta(seconds=30)):
+        await self._rsync(src, dst, delete, timeout)
+
+    async def tar_to(self, src, dst, compression: TarCompression = TarCompression.none,
+                     timeout: timedelta = timedelta(seconds=30)):
+        # compression is skipped, archive is passed through a local pipe only
+        directory, member = tar_source(src)
+        process = await self.__run_process(
+            f'mkdir -p {dst} && tar -c -C {directory} {member} | tar -x -C {dst}', timeout)
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, f"tar {src} {dst}")
+
+    async def tar_from(self, src, dst, compression: TarCompression = TarCompression.none,
+                       timeout: timedelta = timedelta(seconds=30)):
+        await self.tar_to(src, dst, compression, timeout)
+
+    @staticmethod
+    async def __run_process(command, timeout):
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        try:
+            await asyncio.wait_for(process.communicate(), timeout.total_seconds())
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise subprocess.TimeoutExpired(command, timeout.total_seconds())
+        return process
+
+
+class AsyncSshExecutor(AsyncBaseExecutor):
+    """
+    Runs blocking SshExecutor calls in a thread pool. The SshExecutor channel pool decides
+    how many commands are executed on the DUT at the same time. sync() returns the wrapped
+    SshExecutor, so commands are executed by it directly, without the event loop of
+    SyncExecutor.
+    """
+
+    def __init__(self, ssh_executor, workers: int = None):
+        super().__init__()
+        self.ssh_executor = ssh_executor
+        self._threads = ThreadPoolExecutor(
+            max_workers=workers if workers is not None else ssh_executor.pool.size)
+
+    def sync(self):
+        return self.ssh_executor
+
+    async def _call(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._threads, function, *args)
+
+    async def _execute(self, command, timeout):
+        return await self._call(self.ssh_executor._execute, command, timeout)
+
+    def _open_shell_session(self):
+        return self.ssh_executor._open_shell_session()
+
+    async def _rsync(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+        return await self._call(self.ssh_executor._rsync, src, dst, delete, timeout)
+
+    async def _rsync_from(self, src, dst, delete=False,
+                          timeout: timedelta = timedelta(seconds=30)):
+        return await self._call(self.ssh_executor._rsync_from, src, dst, delete, timeout)
+
+    async def tar_to(self, src, dst, compression: TarCompression,
+                     timeout: timedelta = timedelta(seconds=30)):
+        return await self._call(self.ssh_executor.tar_to, src, dst, compression, timeout)
+
+    async def tar_from(self, src, dst, compression: TarCompression,
+                       timeout: timedelta = timedelta(seconds=30)):
+        return await self._call(self.ssh_executor.tar_from, src, dst, compression, timeout)
+
+    def is_remote(self):
+        return True
+
+    def is_active(self):
+        return self.ssh_executor.is_active()
+
+    async def wait_for_connection(self, timeout: timedelta = timedelta(minutes=10)):
+        return await self._call(self.ssh_executor.wait_for_connection, timeout)
+
+
+class SyncExecutor(BaseExecutor):
+    """
+    BaseExecutor interface for AsyncBaseExecutor, so it can be used as TestRun.executor.
+    Coroutines are executed on an event loop running in a separate thread, which allows
+    to call this executor from many threads and from code already running an event loop.
+    """
+
+    def __init__(self, async_executor: AsyncBaseExecutor):
+        super().__init__()
+        self.async_executor = async_executor
+        self._loop = asyncio.new_event_loop()
+        Thread(target=self._loop.run_forever, daemon=True).start()
+
+    def __del__(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def __wait(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _execute(self, command, timeout):
+        return self.__wait(self.async_executor._execute(command, timeout))
+
+    def _open_shell_session(self):
+        return self.async_executor._open_shell_session()
+
+    def _rsync(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+        return self.__wait(self.async_executor._rsync(src, dst, delete, timeout))
+
+    def _rsync_from(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+        return self.__wait(self.async_executor._rsync_from(src, dst, delete, timeout))
+
+    def tar_to(self, src, dst, compression: TarCompression, timeout):
+        return self.__wait(self.async_executor.tar_to(src, dst, compression, timeout))
+
+    def tar_from(self, src, dst, compression: TarCompression, timeout):
+        return self.__wait(self.async_executor.tar_from(src, dst, compression, timeout))
+
+    def is_remote(self):
+        return self.async_executor.is_remote()
+
+    def is_active(self):
+        return self.async_executor.is_active()
+
+    def wait_for_connection(self, timeout: timedelta = timedelta(minutes=10)):
+        return self.__wait(self.async_executor.wait_for_connection(timeout))
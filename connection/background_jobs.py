@@ -0,0 +1,214 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import base64
+import codecs
+import secrets
+import shlex
+from datetime import timedelta, datetime
+from threading import Lock
+
+from log.step_stats import sleep
+from test_utils.output import Output
+
+
+class BackgroundJob:
+    def __init__(self, manager, job_id, command, pid, wrapper_pid,
+                 timeout: timedelta = None):
+        self.manager = manager
+        self.id = job_id
+        self.command = command
+        self.pid = pid
+        # shell waiting for the job and writing its exit code
+        self.wrapper_pid = wrapper_pid
+        self.directory = f"{manager.directory}/{job_id}"
+        self.deadline = datetime.now() + timeout if timeout else None
+        self.timed_out = False
+        self.finished = False
+        self.exit_code = None
+        self.offsets = {'stdout': 0, 'stderr': 0}
+        self.decoders = {source: codecs.getincrementaldecoder('utf-8')(errors='replace')
+                         for source in self.offsets}
+
+    def is_running(self):
+        self.manager.poll([self])
+        return not self.finished
+
+    def wait(self, timeout: timedelta = timedelta(minutes=30)):
+        self.manager.wait([self], timeout)
+        return self.exit_code
+
+    def read_new_output(self):
+        return self.manager.read_new_output([self])[0]
+
+    def output(self):
+        return self.manager.output([self])[0]
+
+    def signal(self, signal: str = 'TERM'):
+        self.manager.signal([self], signal)
+
+    def kill(self):
+        self.signal('KILL')
+
+    def remove(self):
+        self.manager.remove([self])
+
+    def __str__(self):
+        state = f"exit code {self.exit_code}" if self.finished else "running"
+        return f"Job {self.id} (pid {self.pid}, {state}): {self.command}"
+
+
+class BackgroundJobManager:
+    """
+    Starts commands in background on the executor target and tracks them without keeping
+    a connection busy. Every job runs in its own session (so a signal reaches the whole
+    process group) with stdout, stderr and exit code written to files in the job directory.
+    State of all jobs is polled and their new output is read with a single command.
+    """
+    JOBS_DIRECTORY = "/tmp/test_framework_jobs"
+    POLL_INTERVAL = timedelta(seconds=1)
+
+    def __init__(self, executor, directory: str = JOBS_DIRECTORY):
+        self.executor = executor
+        self.directory = directory
+        self.jobs = {}
+        self._lock = Lock()
+
+    def start(self, command, timeout: timedelta = None, capture_output: bool = True):
+        """
+        Starts 'command' in background. If 'timeout' is given, the job is terminated by
+        the first poll performed after it expires. Without 'capture_output' stdout and
+        stderr of the job are discarded.
+        """
+        job_id = f"{datetime.now():%Y%m%d_%H%M%S}_{secrets.token_hex(4)}"
+        directory = f"{self.directory}/{job_id}"
+        redirections = f">{directory}/stdout 2>{directory}/stderr" if capture_output \
+            else ">/dev/null 2>&1"
+        wrapper = f"setsid sh -c {shlex.quote(command)} {redirections} </dev/null & " \
+            f"echo $! $$ >{directory}/pid.tmp; mv {directory}/pid.tmp {directory}/pid; " \
+            f"wait $!; echo $? >{directory}/rc.tmp; mv {directory}/rc.tmp {directory}/rc"
+        output = self.executor.run(
+            f"mkdir -p {directory} && "
+            f"nohup sh -c {shlex.quote(wrapper)} >/dev/null 2>&1 </dev/null & "
+            f"while [ ! -e {directory}/pid ]; do sleep 0.01; done; cat {directory}/pid")
+        if output is None:
+            return None
+        if output.exit_code != 0:
+            raise Exception(f"Unable to start background job '{command}'.\n"
+                            f"stdout: {output.stdout}\nstderr: {output.stderr}")
+        pid, wrapper_pid = (int(pid) for pid in output.stdout.split())
+        job = BackgroundJob(self, job_id, command, pid, wrapper_pid, timeout)
+        with self._lock:
+            self.jobs[job_id] = job
+        return job
+
+    def get_by_pid(self, pid: int):
+        with self._lock:
+            return next((job for job in self.jobs.values() if job.pid == pid), None)
+
+    def running(self):
+        with self._lock:
+            return [job for job in self.jobs.values() if not job.finished]
+
+    def poll(self, jobs=None):
+        """Updates state of given (by default all running) jobs, returns finished ones."""
+        jobs = [job for job in self.__jobs(jobs) if not job.finished]
+        if not jobs:
+            return []
+        output = self.executor.run("; ".join(
+            f"cat {job.directory}/rc 2>/dev/null || "
+            f"{{ kill -0 {job.wrapper_pid} 2>/dev/null && echo -; }} || "
+            f"cat {job.directory}/rc 2>/dev/null || echo ?" for job in jobs))
+        if output is None:
+            return []
+        finished = []
+        for job, state in zip(jobs, output.stdout.splitlines()):
+            state = state.strip()
+            if state == '-':
+                continue
+            # exit code is written by the wrapper after the job ends, so the job is running
+            # until the wrapper ends, '?' means that the wrapper was killed before writing it
+            job.exit_code = int(state) if state != '?' else None
+            job.finished = True
+            finished.append(job)
+        self.__terminate_expired(jobs)
+        return finished
+
+    def wait(self, jobs=None, timeout: timedelta = timedelta(minutes=30),
+             poll_interval: timedelta = POLL_INTERVAL):
+        jobs = [job for job in self.__jobs(jobs) if not job.finished]
+        deadline = datetime.now() + timeout
+        interval = min(0.05, poll_interval.total_seconds())
+        while True:
+            self.poll(jobs)
+            running = [job for job in jobs if not job.finished]
+            if not running:
+                return jobs
+            remaining = (deadline - datetime.now()).total_seconds()
+            if remaining <= 0:
+                raise TimeoutError("Background jobs did not finish before timeout:\n"
+                                   + "\n".join(str(job) for job in running))
+            sleep(min(interval, remaining))
+            interval = min(interval * 2, poll_interval.total_seconds())
+
+    def read_new_output(self, jobs=None):
+        """Returns Output with stdout and stderr written by each job since the last read."""
+        jobs = self.__jobs(jobs)
+        outputs = self.executor.run_many(
+            f"tail -c +{job.offsets['stdout'] + 1} {job.directory}/stdout | base64 -w0; echo; "
+            f"tail -c +{job.offsets['stderr'] + 1} {job.directory}/stderr | base64 -w0"
+            for job in jobs)
+        new_outputs = []
+        for job, output in zip(jobs, outputs):
+            if output is None:
+                new_outputs.append(None)
+                continue
+            encoded = (output.stdout.splitlines() + ['', ''])[:2]
+            text = {}
+            for source, data in zip(('stdout', 'stderr'), encoded):
+                data = base64.b64decode(data)
+                job.offsets[source] += len(data)
+                text[source] = job.decoders[source].decode(data)
+            new_outputs.append(Output(text['stdout'], text['stderr'], job.exit_code))
+        return new_outputs
+
+    def output(self, jobs=None):
+        """Returns whole Output of each job."""
+        jobs = self.__jobs(jobs)
+        outputs = self.executor.run_many(
+            f"cat {job.directory}/stdout; cat {job.directory}/stderr >&2" for job in jobs)
+        return [Output(output.stdout, output.stderr, job.exit_code)
+                if output is not None else None for job, output in zip(jobs, outputs)]
+
+    def signal(self, jobs=None, signal: str = 'TERM'):
+        jobs = [job for job in self.__jobs(jobs) if not job.finished]
+        if jobs:
+            self.executor.run("; ".join(
+                f"kill -s {signal} -- -{job.pid} 2>/dev/null" for job in jobs))
+
+    def remove(self, jobs=None):
+        """Removes files of given (by default all finished) jobs and stops tracking them."""
+        jobs = [job for job in self.__jobs(jobs) if job.finished]
+        if not jobs:
+            return
+        self.executor.run(f"rm -rf {' '.join(job.directory for job in jobs)}")
+        with self._lock:
+            for job in jobs:
+                self.jobs.pop(job.id, None)
+
+    def __terminate_expired(self, jobs):
+        now = datetime.now()
+        expired = [job for job in jobs
+                   if not job.finished and job.deadline is not None and job.deadline < now]
+        for job in expired:
+            job.timed_out = True
+            job.deadline = None
+        self.signal(expired)
+
+    def __jobs(self, jobs):
+        if jobs is not None:
+            return list(jobs)
+        with self._lock:
+            return list(self.jobs.values())
@@ -3,44 +3,333 @@
 # SPDX-License-Identifier: BSD-3-Clause-Clear
 #
 
-from datetime import timedelta
+import os
+import re
+import secrets
+import socket
+import subprocess
+import time
+from datetime import timedelta, datetime
+from threading import Lock
+
+from connection.background_jobs import BackgroundJobManager
+from connection.command_cache import CommandCache
+from connection.executor_metrics import ExecutorMetrics
+from connection.tar_transfer import TarCompression, count_files
 from core.test_run import TestRun
+from log.step_stats import sleep
+from test_utils.output import Output, OutputStream
 
 
 class BaseExecutor:
+    # directory trees with more files are copied as a single tar stream
+    tar_threshold = 256
+    tar_compression = TarCompression.gzip
+
+    def __init__(self):
+        self.shell_session_enabled = False
+        self._shell_session = None
+        self._shell_session_lock = Lock()
+        self._jobs = None
+        self._background_jobs = []
+        self.cache = None
+        self.metrics = ExecutorMetrics()
+
     def _execute(self, command, timeout):
         raise NotImplementedError()
 
-    def rsync(self, src, dst, delete, timeout):
+    def _open_shell_session(self):
+        raise NotImplementedError()
+
+    def _execute_stream(self, command, timeout):
+        # Generator yielding ('stdout' | 'stderr', bytes) tuples and returning exit code.
+        # Executors unable to stream output return it at once, after command is finished.
+        output = self._execute(command, timeout)
+        if output is None:
+            return None
+        yield 'stdout', output.stdout.encode()
+        yield 'stderr', output.stderr.encode()
+        return output.exit_code
+
+    def _rsync(self, src, dst, delete, timeout):
+        raise NotImplementedError()
+
+    def _rsync_from(self, src, dst, delete, timeout):
+        raise NotImplementedError()
+
+    def tar_to(self, src, dst, compression: TarCompression, timeout):
+        raise NotImplementedError()
+
+    def tar_from(self, src, dst, compression: TarCompression, timeout):
         raise NotImplementedError()
 
+    def rsync(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+        start_time = time.monotonic()
+        try:
+            if not delete and os.path.isdir(src) \
+                    and count_files(src, self.tar_threshold) > self.tar_threshold:
+                return self.tar_to(src, dst, self.tar_compression, timeout)
+            return self._rsync(src, dst, delete, timeout)
+        finally:
+            if TestRun.LOGGER is not None:
+                TestRun.LOGGER.add_step_stats(executor_time=time.monotonic() - start_time)
+
+    def rsync_from(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+        start_time = time.monotonic()
+        try:
+            if not delete and self.__count_remote_files(src) > self.tar_threshold:
+                return self.tar_from(src, dst, self.tar_compression, timeout)
+            return self._rsync_from(src, dst, delete, timeout)
+        finally:
+            if TestRun.LOGGER is not None:
+                TestRun.LOGGER.add_step_stats(executor_time=time.monotonic() - start_time)
+
+    def __count_remote_files(self, path):
+        output = self.run(f"find {path} -type f | head -n {self.tar_threshold + 1} | wc -l")
+        if output is None or output.exit_code != 0:
+            return 0
+        return int(output.stdout)
+
     def is_remote(self):
         return False
 
     def is_active(self):
         return True
 
-    def wait_for_connection(self):
+    def wait_for_connection(self, timeout: timedelta = timedelta(minutes=10)):
         pass
 
-    def run(self, command, timeout: timedelta = timedelta(minutes=30)):
-        if TestRun.dut and TestRun.dut.env:
+    def enable_shell_session(self):
+        self.shell_session_enabled = True
+
+    def disable_shell_session(self):
+        self.shell_session_enabled = False
+        self.close_shell_session()
+
+    def close_shell_session(self):
+        if self._shell_session is not None:
+            self._shell_session.close()
+            self._shell_session = None
+
+    def __execute_in_shell_session(self, command, timeout):
+        env = TestRun.dut.env if TestRun.dut else None
+        with self._shell_session_lock:
+            session = self._shell_session
+            if session is None or not session.is_alive() or session.env != env:
+                self.close_shell_session()
+                session = self._open_shell_session()
+                session.apply_env(env)
+                self._shell_session = session
+        return session.execute(command, timeout)
+
+    def __execute(self, command, timeout, commands=None):
+        # 'commands' are commands without env prefix, batched ones share the execution time
+        commands = commands or [command]
+        start_time = time.monotonic()
+        output = None
+        timed_out = False
+        try:
+            if self.shell_session_enabled:
+                output = self.__execute_in_shell_session(command, timeout)
+            else:
+                output = self._execute(command, timeout)
+            return output
+        except (TimeoutError, socket.timeout, subprocess.TimeoutExpired):
+            timed_out = True
+            raise
+        finally:
+            self.__add_step_stats(start_time, command, output, len(commands))
+            seconds = (time.monotonic() - start_time) / len(commands)
+            for executed_command in commands:
+                self.metrics.record(executed_command, seconds,
+                                    output if len(commands) == 1 else None, timed_out)
+
+    @staticmethod
+    def __add_step_stats(start_time, command, output, commands_count=1):
+        transferred_bytes = len(command)
+        if output is not None:
+            transferred_bytes += len(output.stdout or '') + len(output.stderr or '')
+        if TestRun.LOGGER is not None:
+            TestRun.LOGGER.add_step_stats(executor_time=time.monotonic() - start_time,
+                                          commands=commands_count,
+                                          transferred_bytes=transferred_bytes)
+
+    def enable_cache(self, size: int = CommandCache.DEFAULT_SIZE,
+                     ttl: timedelta = CommandCache.DEFAULT_TTL):
+        self.cache = CommandCache(size, ttl)
+
+    def disable_cache(self):
+        self.cache = None
+
+    def __use_cache(self, command, cacheable):
+        if self.cache is None:
+            return False
+        return cacheable if cacheable is not None else self.cache.is_cacheable(command)
+
+    def __invalidate_cache(self, command):
+        if self.cache is not None and self.cache.is_mutating(command):
+            self.cache.invalidate()
+
+    def run(self, command, timeout: timedelta = timedelta(minutes=30), cacheable: bool = None):
+        commands = [command]
+        if TestRun.dut and TestRun.dut.env and not self.shell_session_enabled:
             command = f"{TestRun.dut.env} && {command}"
         command_id = TestRun.LOGGER.get_new_command_id()
-        TestRun.LOGGER.write_command_to_command_log(command, command_id)
-        output = self._execute(command, timeout)
+        use_cache = self.__use_cache(command, cacheable)
+        output = self.cache.get(command) if use_cache else None
+        if output is not None:
+            TestRun.LOGGER.write_command_to_command_log(f"{command}  # cached", command_id)
+            self.metrics.record_cached(commands[0])
+        else:
+            TestRun.LOGGER.write_command_to_command_log(command, command_id)
+            if use_cache:
+                output = self.__execute(command, timeout, commands)
+                self.cache.put(command, output)
+            else:
+                output = self.__execute_and_invalidate(command, timeout, commands)
         TestRun.LOGGER.write_output_to_command_log(output, command_id)
         return output
 
+    def __execute_and_invalidate(self, command, timeout, commands=None):
+        # invalidate also after execution, cacheable command could run in the meantime
+        self.__invalidate_cache(command)
+        try:
+            return self.__execute(command, timeout, commands)
+        finally:
+            self.__invalidate_cache(command)
+
+    def run_stream(self, command, timeout: timedelta = timedelta(minutes=30),
+                   buffer_size: int = 1000, chunks: bool = False, log_output: bool = False):
+        """
+        Returns OutputStream of the command, use it as a context manager:
+        'with executor.run_stream(command) as stream: for source, line in stream: ...'
+        """
+        original_command = command
+        if TestRun.dut and TestRun.dut.env:
+            command = f"{TestRun.dut.env} && {command}"
+        self.__invalidate_cache(command)
+        command_id = TestRun.LOGGER.get_new_command_id()
+        TestRun.LOGGER.write_command_to_command_log(command, command_id)
+
+        start_time = time.monotonic()
+        streamed = {'stdout': 0, 'stderr': 0}
+
+        def write_data(source, text):
+            streamed[source] += 1
+            TestRun.LOGGER.write_to_command_log_file(
+                f"Command id: {command_id}\n\t{source}: {text}")
+
+        def finish(output):
+            # stream is consumed by the caller, so this includes time of processing the output
+            self.__add_step_stats(start_time, command, output)
+            self.metrics.record(original_command, time.monotonic() - start_time, output)
+            if log_output:
+                TestRun.LOGGER.write_to_command_log(
+                    f"Command id: {command_id}\n\tstreamed {streamed['stdout']} stdout and "
+                    f"{streamed['stderr']} stderr {'chunks' if chunks else 'lines'} "
+                    f"to command log")
+            TestRun.LOGGER.write_output_to_command_log(output, command_id)
+
+        return OutputStream(
+            self._execute_stream(command, timeout),
+            buffer_size,
+            chunks,
+            on_data=write_data if log_output else None,
+            on_finish=finish)
+
+    def run_many(self, commands, timeout: timedelta = timedelta(minutes=30),
+                 cacheable: bool = None):
+        commands = list(commands)
+        if not commands:
+            return []
+        env = TestRun.dut.env if TestRun.dut and not self.shell_session_enabled else None
+        full_commands = [f"{env} && {command}" if env else command for command in commands]
+        command_ids = []
+        outputs = [None] * len(commands)
+        uncached = []
+        for i, command in enumerate(commands):
+            command_id = TestRun.LOGGER.get_new_command_id()
+            command_ids.append(command_id)
+            if self.__use_cache(full_commands[i], cacheable):
+                outputs[i] = self.cache.get(full_commands[i])
+            if outputs[i] is not None:
+                TestRun.LOGGER.write_command_to_command_log(f"{command}  # cached", command_id)
+                self.metrics.record_cached(command)
+            else:
+                TestRun.LOGGER.write_command_to_command_log(command, command_id)
+                uncached.append(i)
+        if uncached:
+            marker = f"__TF_{secrets.token_hex(8)}__"
+            script = "\n".join(
+                f"( {full_commands[i]}\n) </dev/null; "
+                f"printf '\\n{marker} %d\\n' \"$?\"; printf '\\n{marker}\\n' >&2"
+                for i in uncached)
+            batch = [commands[i] for i in uncached]
+            if all(self.__use_cache(full_commands[i], cacheable) for i in uncached):
+                output = self.__execute(script, timeout, batch)
+            else:
+                output = self.__execute_and_invalidate(script, timeout, batch)
+            for i, command_output in zip(
+                    uncached, self.__split_batch_output(output, marker, len(uncached))):
+                outputs[i] = command_output
+                if len(batch) > 1:
+                    self.metrics.record_output(commands[i], command_output)
+                if self.__use_cache(full_commands[i], cacheable):
+                    self.cache.put(full_commands[i], command_output)
+        for command_id, command_output in zip(command_ids, outputs):
+            TestRun.LOGGER.write_output_to_command_log(command_output, command_id)
+        return outputs
+
+    @staticmethod
+    def __split_batch_output(output, marker, commands_count):
+        if output is None:
+            return [None] * commands_count
+        stdout = re.split(f"\n{marker} (-?\\d+)\n?", output.stdout)
+        stderr = re.split(f"\n{marker}\n?", output.stderr)
+        if len(stdout) < 2 * commands_count + 1 or len(stderr) < commands_count + 1:
+            raise Exception(f"Batch execution was interrupted, received only "
+                            f"{(len(stdout) - 1) // 2} of {commands_count} command outputs.\n"
+                            f"stdout: {output.stdout}\nstderr: {output.stderr}")
+        return [Output(stdout[2 * i].rstrip(), stderr[i].rstrip(), int(stdout[2 * i + 1]))
+                for i in range(commands_count)]
+
+    @property
+    def jobs(self):
+        if self._jobs is None:
+            self._jobs = BackgroundJobManager(self)
+        return self._jobs
+
     def run_in_background(self, command):
-        command += "&> /dev/null &echo $!"
-        output = self.run(command)
+        # jobs which were not waited for are removed once they finish
+        if self._background_jobs:
+            self.__remove_background_jobs(self.jobs.poll(self._background_jobs))
+        job = self.jobs.start(command, capture_output=False)
 
-        if output is not None:
-            return int(output.stdout)
+        if job is not None:
+            self._background_jobs.append(job)
+            return job.pid
+
+    def __remove_background_jobs(self, jobs):
+        self.jobs.remove(jobs)
+        self._background_jobs = [job for job in self._background_jobs if job not in jobs]
 
     def wait_cmd_finish(self, pid: int, timeout: timedelta = timedelta(minutes=30)):
-        self.run(f"tail --pid={pid} -f /dev/null", timeout)
+        job = self.jobs.get_by_pid(pid)
+        if job is not None:
+            exit_code = job.wait(timeout)
+            if job in self._background_jobs:
+                self.__remove_background_jobs([job])
+            return exit_code
+        deadline = datetime.now() + timeout
+        interval = 0.05
+        while True:
+            output = self.run(f"kill -0 {pid} 2>/dev/null")
+            if output is None or output.exit_code != 0:
+                return None
+            if datetime.now() >= deadline:
+                raise TimeoutError(f"Process {pid} did not finish before timeout.")
+            sleep(interval)
+            interval = min(interval * 2, BackgroundJobManager.POLL_INTERVAL.total_seconds())
 
     def run_expect_success(self, command):
         output = self.run(command)
@@ -0,0 +1,83 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import re
+from collections import OrderedDict
+from datetime import timedelta, datetime
+from threading import Lock
+
+
+class CommandCache:
+    """
+    LRU cache of outputs of read-only commands. Only commands marked as cacheable (explicitly
+    by the caller or by matching one of 'cacheable' patterns) are cached. Whole cache is
+    invalidated when a command matching one of 'mutating' patterns is executed.
+    """
+    DEFAULT_SIZE = 256
+    DEFAULT_TTL = timedelta(minutes=1)
+    DEFAULT_MUTATING = [
+        r"\b(parted|partprobe|mkfs(\.\w+)?|mkswap|wipefs|fdisk|sgdisk|hdparm|mount|umount|"
+        r"dd|fio|modprobe|insmod|rmmod|udevadm|losetup|dmsetup|nvme|blkdiscard|reboot)\b",
+        r">\s*/(dev|sys|proc)/",
+    ]
+
+    def __init__(self, size: int = DEFAULT_SIZE, ttl: timedelta = DEFAULT_TTL,
+                 cacheable: list = None, mutating: list = None):
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._cacheable = [re.compile(pattern) for pattern in cacheable or []]
+        self._mutating = [re.compile(pattern)
+                          for pattern in (mutating if mutating is not None
+                                          else self.DEFAULT_MUTATING)]
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def mark_cacheable(self, pattern):
+        self._cacheable.append(re.compile(pattern))
+
+    def mark_mutating(self, pattern):
+        self._mutating.append(re.compile(pattern))
+
+    def is_cacheable(self, command):
+        return any(pattern.search(command) for pattern in self._cacheable)
+
+    def is_mutating(self, command):
+        return any(pattern.search(command) for pattern in self._mutating)
+
+    def get(self, command):
+        with self._lock:
+            entry = self._entries.get(command)
+            if entry is not None and datetime.now() - entry[1] > self.ttl:
+                del self._entries[command]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(command)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, command, output):
+        if output is None:
+            return
+        with self._lock:
+            self._entries[command] = (output, datetime.now())
+            self._entries.move_to_end(command)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __str__(self):
+        requests = self.hits + self.misses
+        ratio = self.hits / requests * 100 if requests else 0.0
+        return f"Command cache: {self.hits} hits, {self.misses} misses ({ratio:.1f}% hit ratio), " \
+            f"{self.invalidations} invalidations, {len(self._entries)} entries"
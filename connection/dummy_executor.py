@@ -10,5 +10,14 @@ class DummyExecutor(BaseExecutor):
     def _execute(self, command, timeout=None):
         print(command)
 
-    def rsync(self, src, dst, delete=False, timeout=None):
+    def _rsync(self, src, dst, delete=False, timeout=None):
         print(f'COPY FROM "{src}" TO "{dst}"')
+
+    def _rsync_from(self, src, dst, delete=False, timeout=None):
+        print(f'COPY FROM DUT "{src}" TO "{dst}"')
+
+    def tar_to(self, src, dst, compression=None, timeout=None):
+        print(f'COPY AS TAR FROM "{src}" TO "{dst}"')
+
+    def tar_from(self, src, dst, compression=None, timeout=None):
+        print(f'COPY AS TAR FROM DUT "{src}" TO "{dst}"')
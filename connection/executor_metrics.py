@@ -0,0 +1,156 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import json
+import math
+import os
+from threading import Lock
+
+
+class LatencyHistogram:
+    """Histogram with logarithmic buckets, each 2^(1/4) times wider than the previous one."""
+    MIN_LATENCY = 1e-4
+    BUCKETS_PER_OCTAVE = 4
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        bucket = 0
+        if seconds > self.MIN_LATENCY:
+            bucket = math.ceil(math.log2(seconds / self.MIN_LATENCY) * self.BUCKETS_PER_OCTAVE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def upper_bound(self, bucket):
+        return self.MIN_LATENCY * 2 ** (bucket / self.BUCKETS_PER_OCTAVE)
+
+    def percentile(self, percent):
+        """Returns upper bound of the bucket with the given percentile (at most max latency)."""
+        if self.count == 0:
+            return 0.0
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.upper_bound(bucket), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "buckets": [[self.upper_bound(bucket), self.buckets[bucket]]
+                        for bucket in sorted(self.buckets)]
+        }
+
+
+class CommandMetrics:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.cached = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.stdout_bytes = 0
+        self.stderr_bytes = 0
+
+    def to_dict(self):
+        return {
+            "executed": self.latency.count,
+            "cached": self.cached,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "stdout_bytes": self.stdout_bytes,
+            "stderr_bytes": self.stderr_bytes,
+            "latency": self.latency.to_dict()
+        }
+
+
+class ExecutorMetrics:
+    """
+    Counts, latency histograms, output sizes and timeouts of executed commands grouped by
+    command prefix (program name, e.g. 'parted' or 'fio', followed by 'prefix_words' - 1
+    next words). Commands batched by run_many share the time of the whole batch.
+    """
+    SKIPPED_WORDS = ("sudo", "nohup", "exec", "command", "(", "{")
+    SUMMARY_HEADER = ["command", "count", "total", "p50", "p99", "timeouts"]
+
+    def __init__(self, prefix_words: int = 1):
+        self.prefix_words = prefix_words
+        self.commands = {}
+        self._lock = Lock()
+
+    def prefix(self, command):
+        words = command.split()
+        while words and (words[0] in self.SKIPPED_WORDS
+                         or ('=' in words[0] and not words[0].startswith(('-', '=')))):
+            words.pop(0)
+        if not words:
+            return command.strip()
+        words[0] = os.path.basename(words[0].lstrip('({')) or words[0]
+        return " ".join(words[:self.prefix_words])
+
+    def __get(self, command):
+        prefix = self.prefix(command)
+        metrics = self.commands.get(prefix)
+        if metrics is None:
+            metrics = self.commands[prefix] = CommandMetrics()
+        return metrics
+
+    def record(self, command, seconds, output=None, timed_out=False):
+        with self._lock:
+            metrics = self.__get(command)
+            metrics.latency.add(seconds)
+            if timed_out:
+                metrics.timeouts += 1
+            if output is not None:
+                self.__add_output(metrics, output)
+
+    def record_output(self, command, output):
+        if output is None:
+            return
+        with self._lock:
+            self.__add_output(self.__get(command), output)
+
+    def record_cached(self, command):
+        with self._lock:
+            self.__get(command).cached += 1
+
+    @staticmethod
+    def __add_output(metrics, output):
+        metrics.stdout_bytes += len(output.stdout or '')
+        metrics.stderr_bytes += len(output.stderr or '')
+        if output.exit_code != 0:
+            metrics.failed += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {prefix: metrics.to_dict() for prefix, metrics in self.commands.items()}
+
+    def dump(self, path):
+        with open(path, "w") as metrics_file:
+            json.dump(self.to_dict(), metrics_file, indent=2)
+
+    def summary(self, count: int = 10):
+        """Returns rows describing command prefixes which took the most time."""
+        with self._lock:
+            items = sorted(self.commands.items(),
+                           key=lambda item: item[1].latency.total, reverse=True)
+            return [[prefix,
+                     str(metrics.latency.count + metrics.cached),
+                     f"{metrics.latency.total:.2f} s",
+                     f"{metrics.latency.percentile(50) * 1000:.1f} ms",
+                     f"{metrics.latency.percentile(99) * 1000:.1f} ms",
+                     str(metrics.timeouts)]
+                    for prefix, metrics in items[:count]]
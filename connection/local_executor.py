@@ -3,10 +3,14 @@
 # SPDX-License-Identifier: BSD-3-Clause-Clear
 #
 
+import os
+import selectors
 import subprocess
-from datetime import timedelta
+from datetime import timedelta, datetime
 
 from connection.base_executor import BaseExecutor
+from connection.shell_session import LocalShellSession
+from connection.tar_transfer import TarCompression, tar_source
 from test_utils.output import Output
 
 
@@ -23,7 +27,41 @@ class LocalExecutor(BaseExecutor):
                       completed_process.stderr,
                       completed_process.returncode)
 
-    def rsync(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+    def _execute_stream(self, command, timeout):
+        process = subprocess.Popen(
+            command,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        deadline = datetime.now() + timeout
+        selector = selectors.DefaultSelector()
+        selector.register(process.stdout, selectors.EVENT_READ, 'stdout')
+        selector.register(process.stderr, selectors.EVENT_READ, 'stderr')
+        try:
+            while selector.get_map():
+                remaining = (deadline - datetime.now()).total_seconds()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(command, timeout.total_seconds())
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fileobj.fileno(), 65536)
+                    if data:
+                        yield key.data, data
+                    else:
+                        selector.unregister(key.fileobj)
+            remaining = max((deadline - datetime.now()).total_seconds(), 0)
+            return process.wait(remaining)
+        finally:
+            selector.close()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+
+    def _open_shell_session(self):
+        return LocalShellSession()
+
+    def _rsync(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
         options = []
         if delete:
             options.append("--delete")
@@ -33,3 +71,22 @@ class LocalExecutor(BaseExecutor):
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             timeout=timeout.total_seconds())
+
+    def _rsync_from(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+        self._rsync(src, dst, delete, timeout)
+
+    def tar_to(self, src, dst, compression: TarCompression = TarCompression.none,
+               timeout: timedelta = timedelta(seconds=30)):
+        # compression is skipped, archive is passed through a local pipe only
+        directory, member = tar_source(src)
+        subprocess.run(
+            f'mkdir -p {dst} && tar -c -C {directory} {member} | tar -x -C {dst}',
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=timeout.total_seconds(),
+            check=True)
+
+    def tar_from(self, src, dst, compression: TarCompression = TarCompression.none,
+                 timeout: timedelta = timedelta(seconds=30)):
+        self.tar_to(src, dst, compression, timeout)
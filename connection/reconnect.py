@@ -0,0 +1,64 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import random
+import socket
+from datetime import timedelta
+
+
+class Backoff:
+    """Exponentially growing delays with random jitter, capped at 'maximum'."""
+
+    def __init__(self, initial: timedelta = timedelta(milliseconds=250),
+                 maximum: timedelta = timedelta(seconds=10), factor: float = 2,
+                 jitter: float = 0.5):
+        self.initial = initial.total_seconds()
+        self.maximum = maximum.total_seconds()
+        self.factor = factor
+        self.jitter = jitter
+        self._delay = self.initial
+
+    def reset(self):
+        self._delay = self.initial
+
+    def next_delay(self):
+        delay = self._delay * (1 - self.jitter * random.random())
+        self._delay = min(self._delay * self.factor, self.maximum)
+        return delay
+
+
+class ReconnectStats:
+    def __init__(self):
+        self.reconnects = 0
+        self.attempts = 0
+        self.last_latency = None
+        self.max_latency = timedelta()
+        self.total_latency = timedelta()
+
+    def record(self, latency: timedelta, attempts: int):
+        self.reconnects += 1
+        self.attempts += attempts
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+    def average_latency(self):
+        return self.total_latency / self.reconnects if self.reconnects else None
+
+    def __str__(self):
+        if not self.reconnects:
+            return "No reconnections"
+        return f"{self.reconnects} reconnections in {self.attempts} attempts, latency: " \
+            f"last {self.last_latency.total_seconds():.2f} s, " \
+            f"average {self.average_latency().total_seconds():.2f} s, " \
+            f"max {self.max_latency.total_seconds():.2f} s"
+
+
+def is_port_open(host, port, timeout: timedelta = timedelta(seconds=1)):
+    try:
+        with socket.create_connection((host, port), timeout.total_seconds()):
+            return True
+    except OSError:
+        return False
@@ -0,0 +1,254 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import os
+import posixpath
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta, datetime
+
+import paramiko
+
+from core.test_run import TestRun
+
+
+class TransferStats:
+    def __init__(self, description):
+        self.description = description
+        self.files = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.removed = 0
+        self.start_time = datetime.now()
+        self.duration = timedelta()
+
+    def throughput(self):
+        seconds = self.duration.total_seconds()
+        return self.bytes / seconds if seconds > 0 else 0.0
+
+    def __str__(self):
+        return f"{self.description}: {self.files} files copied, {self.skipped} up to date, " \
+            f"{self.removed} removed, {self.bytes} B in {self.duration.total_seconds():.2f} s " \
+            f"({self.throughput() / 2 ** 20:.2f} MiB/s)"
+
+
+class _SftpSessions:
+    """SFTP sessions opened on demand, one per thread."""
+
+    def __init__(self, transport, window_size, timeout: timedelta = None):
+        self._transport = transport
+        self._window_size = window_size
+        self._timeout = timeout
+        self._local = threading.local()
+        self._clients = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = paramiko.SFTPClient.from_transport(self._transport,
+                                                        window_size=self._window_size)
+            if self._timeout is not None:
+                client.get_channel().settimeout(self._timeout.total_seconds())
+            self._local.client = client
+            with self._lock:
+                self._clients.append(client)
+        return client
+
+    def close(self):
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients.clear()
+
+
+class SftpTransfer:
+    """
+    Copies files and directory trees between the controller and the DUT over SFTP sessions
+    opened on an already connected paramiko transport. Files are copied in parallel by
+    'workers' SFTP sessions with pipelined reads and writes. As with rsync, files with the same
+    size and modification time on both sides are skipped and trailing '/' in the source path
+    means that only directory content is copied.
+    """
+    WINDOW_SIZE = 2 ** 26
+
+    def __init__(self, ssh_client, workers: int = 3):
+        self._ssh = ssh_client
+        self.workers = workers
+
+    def upload(self, src, dst, delete: bool = False, timeout: timedelta = None):
+        stats = TransferStats(f"Copy '{src}' to DUT '{dst}'")
+        sessions = _SftpSessions(self._ssh.get_transport(), self.WINDOW_SIZE, timeout)
+        try:
+            sftp = sessions.get()
+            if os.path.isdir(src):
+                if not src.endswith('/'):
+                    dst = posixpath.join(dst, os.path.basename(src.rstrip('/')))
+                files = self.__upload_dir(sftp, src, dst, delete, stats)
+            else:
+                if dst.endswith('/') or self.__remote_is_dir(sftp, dst):
+                    dst = posixpath.join(dst, os.path.basename(src))
+                files = self.__changed(
+                    [(src, dst, os.stat(src))],
+                    lambda local, remote: self.__remote_stat(sftp, remote), stats)
+            self.__copy(files, sessions, self.__put, stats)
+        finally:
+            sessions.close()
+        self.__report(stats)
+        return stats
+
+    def download(self, src, dst, delete: bool = False, timeout: timedelta = None):
+        stats = TransferStats(f"Copy '{src}' from DUT to '{dst}'")
+        sessions = _SftpSessions(self._ssh.get_transport(), self.WINDOW_SIZE, timeout)
+        try:
+            sftp = sessions.get()
+            if self.__remote_is_dir(sftp, src):
+                if not src.endswith('/'):
+                    dst = os.path.join(dst, posixpath.basename(src.rstrip('/')))
+                files = self.__download_dir(sftp, src, dst, delete, stats)
+            else:
+                if dst.endswith(os.sep) or os.path.isdir(dst):
+                    dst = os.path.join(dst, posixpath.basename(src))
+                files = self.__changed(
+                    [(src, dst, sftp.stat(src))],
+                    lambda remote, local: self.__local_stat(local), stats)
+            self.__copy(files, sessions, self.__get, stats)
+        finally:
+            sessions.close()
+        self.__report(stats)
+        return stats
+
+    def __copy(self, files, sessions, copy_file, stats):
+        with ThreadPoolExecutor(max_workers=self.workers) as workers:
+            futures = [workers.submit(copy_file, sessions, src, dst, attributes)
+                       for src, dst, attributes in files]
+            for future in futures:
+                stats.bytes += future.result()
+                stats.files += 1
+        stats.duration = datetime.now() - stats.start_time
+
+    @staticmethod
+    def __put(sessions, src, dst, attributes):
+        sftp = sessions.get()
+        sftp.put(src, dst, confirm=False)
+        sftp.chmod(dst, stat.S_IMODE(attributes.st_mode))
+        sftp.utime(dst, (attributes.st_atime, attributes.st_mtime))
+        return attributes.st_size
+
+    @staticmethod
+    def __get(sessions, src, dst, attributes):
+        sftp = sessions.get()
+        sftp.get(src, dst)
+        os.utime(dst, (attributes.st_atime, attributes.st_mtime))
+        return attributes.st_size
+
+    @staticmethod
+    def __changed(files, get_target_attributes, stats):
+        changed = []
+        for src, dst, attributes in files:
+            target = get_target_attributes(src, dst)
+            if target is not None and target.st_size == attributes.st_size \
+                    and int(target.st_mtime) == int(attributes.st_mtime):
+                stats.skipped += 1
+            else:
+                changed.append((src, dst, attributes))
+        return changed
+
+    def __upload_dir(self, sftp, src, dst, delete, stats):
+        files = []
+        for local_dir, dir_names, file_names in os.walk(src):
+            relative_dir = os.path.relpath(local_dir, src)
+            remote_dir = posixpath.normpath(
+                posixpath.join(dst, *relative_dir.split(os.sep)))
+            self.__remote_makedirs(sftp, remote_dir)
+            remote_items = {item.filename: item for item in sftp.listdir_attr(remote_dir)}
+            local_files = [(os.path.join(local_dir, name), posixpath.join(remote_dir, name),
+                            os.stat(os.path.join(local_dir, name))) for name in file_names]
+            files += self.__changed(
+                local_files, lambda local, remote: remote_items.get(posixpath.basename(remote)),
+                stats)
+            if delete:
+                for name, item in remote_items.items():
+                    if name not in dir_names and name not in file_names:
+                        self.__remote_remove(sftp, posixpath.join(remote_dir, name), item)
+                        stats.removed += 1
+        return files
+
+    def __download_dir(self, sftp, src, dst, delete, stats):
+        files = []
+        remote_dirs = [(src, dst)]
+        while remote_dirs:
+            remote_dir, local_dir = remote_dirs.pop()
+            os.makedirs(local_dir, exist_ok=True)
+            remote_items = sftp.listdir_attr(remote_dir)
+            remote_files = []
+            for item in remote_items:
+                remote_path = posixpath.join(remote_dir, item.filename)
+                local_path = os.path.join(local_dir, item.filename)
+                if stat.S_ISDIR(item.st_mode):
+                    remote_dirs.append((remote_path, local_path))
+                else:
+                    remote_files.append((remote_path, local_path, item))
+            files += self.__changed(
+                remote_files, lambda remote, local: self.__local_stat(local), stats)
+            if delete:
+                remote_names = {item.filename for item in remote_items}
+                for name in os.listdir(local_dir):
+                    if name not in remote_names:
+                        self.__local_remove(os.path.join(local_dir, name))
+                        stats.removed += 1
+        return files
+
+    @staticmethod
+    def __local_stat(path):
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def __remote_stat(sftp, path):
+        try:
+            return sftp.stat(path)
+        except IOError:
+            return None
+
+    @staticmethod
+    def __remote_is_dir(sftp, path):
+        try:
+            return stat.S_ISDIR(sftp.stat(path).st_mode)
+        except IOError:
+            return False
+
+    def __remote_makedirs(self, sftp, path):
+        if self.__remote_is_dir(sftp, path):
+            return
+        parent = posixpath.dirname(path.rstrip('/'))
+        if parent and parent != path:
+            self.__remote_makedirs(sftp, parent)
+        sftp.mkdir(path)
+
+    def __remote_remove(self, sftp, path, attributes):
+        if stat.S_ISDIR(attributes.st_mode):
+            for item in sftp.listdir_attr(path):
+                self.__remote_remove(sftp, posixpath.join(path, item.filename), item)
+            sftp.rmdir(path)
+        else:
+            sftp.remove(path)
+
+    @staticmethod
+    def __local_remove(path):
+        if os.path.isdir(path) and not os.path.islink(path):
+            for name in os.listdir(path):
+                SftpTransfer.__local_remove(os.path.join(path, name))
+            os.rmdir(path)
+        else:
+            os.remove(path)
+
+    @staticmethod
+    def __report(stats):
+        if TestRun.LOGGER is not None:
+            TestRun.LOGGER.debug(str(stats))
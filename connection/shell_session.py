@@ -0,0 +1,121 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import secrets
+import subprocess
+from datetime import timedelta, datetime
+from queue import Queue, Empty
+from threading import Lock, Thread
+
+from test_utils.output import Output
+
+
+class ShellSession:
+    """
+    Long-lived shell used to execute commands without spawning a new shell for each of them.
+    Every command is executed in a subshell with detached stdin and is followed by sentinel
+    markers printed to stdout and stderr, which allow to split shell output streams back into
+    per-command stdout, stderr and exit code.
+    """
+
+    def __init__(self, stdin, stdout, stderr):
+        self.env = None
+        self._stdin = stdin
+        self._marker = f"__TF_{secrets.token_hex(8)}__".encode()
+        self._lock = Lock()
+        self._stdout_lines = Queue()
+        self._stderr_lines = Queue()
+        for stream, lines in ((stdout, self._stdout_lines), (stderr, self._stderr_lines)):
+            Thread(target=ShellSession.__read_lines, args=(stream, lines), daemon=True).start()
+
+    def is_alive(self):
+        raise NotImplementedError()
+
+    def close(self):
+        raise NotImplementedError()
+
+    def apply_env(self, env):
+        if env:
+            output = self.__execute(env, timedelta(minutes=1), subshell=False)
+            if output.exit_code != 0:
+                raise Exception(f"Unable to apply environment '{env}' in shell session.\n"
+                                f"stdout: {output.stdout}\nstderr: {output.stderr}")
+        self.env = env
+
+    def execute(self, command, timeout: timedelta):
+        return self.__execute(command, timeout)
+
+    def __execute(self, command, timeout: timedelta, subshell: bool = True):
+        marker = self._marker.decode()
+        script = f"( {command}\n) </dev/null" if subshell else command
+        script += f"\nprintf '\\n{marker} %d\\n' \"$?\"\nprintf '\\n{marker}\\n' >&2\n"
+        deadline = datetime.now() + timeout
+        with self._lock:
+            self._stdin.write(script.encode())
+            self._stdin.flush()
+            stdout, exit_code = self.__read_until_marker(self._stdout_lines, command, deadline)
+            stderr, _ = self.__read_until_marker(self._stderr_lines, command, deadline)
+        return Output(stdout, stderr, exit_code)
+
+    def __read_until_marker(self, lines, command, deadline):
+        data = []
+        while True:
+            remaining = (deadline - datetime.now()).total_seconds()
+            try:
+                line = lines.get(timeout=max(remaining, 0))
+            except Empty:
+                self.close()
+                raise TimeoutError(f"Command '{command}' did not finish before timeout.")
+            if line is None:
+                self.close()
+                raise ConnectionError(f"Shell session closed while executing '{command}'.")
+            if line.startswith(self._marker):
+                status = line[len(self._marker):].strip()
+                # drop new line printed before the marker
+                output = b"".join(data)[:-1]
+                return output, int(status) if status else None
+            data.append(line)
+
+    @staticmethod
+    def __read_lines(stream, lines):
+        try:
+            for line in iter(stream.readline, b""):
+                lines.put(line)
+        except Exception:
+            pass
+        lines.put(None)
+
+
+class LocalShellSession(ShellSession):
+    def __init__(self):
+        self._process = subprocess.Popen(
+            ["bash"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        super().__init__(self._process.stdin, self._process.stdout, self._process.stderr)
+
+    def is_alive(self):
+        return self._process.poll() is None
+
+    def close(self):
+        if self.is_alive():
+            self._process.kill()
+        self._process.wait()
+
+
+class SshShellSession(ShellSession):
+    def __init__(self, ssh_client):
+        self._channel = ssh_client.get_transport().open_session()
+        self._channel.exec_command("bash")
+        super().__init__(self._channel.makefile('wb'),
+                         self._channel.makefile('rb'),
+                         self._channel.makefile_stderr('rb'))
+
+    def is_alive(self):
+        return self._channel.active and not self._channel.exit_status_ready()
+
+    def close(self):
+        self._channel.close()
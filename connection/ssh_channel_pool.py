@@ -0,0 +1,124 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta, datetime
+from threading import Lock, BoundedSemaphore, Event, Thread
+
+
+class SshChannelPool:
+    """
+    Keeps up to 'size' SSH session channels opened in advance on top of a connected
+    paramiko.SSHClient transport. A session channel can execute only one command, so every
+    used channel is closed and a fresh one is opened in the background to replace it.
+    At most 'size' commands are executed at the same time; warm channels unused for longer
+    than 'idle_timeout' are closed.
+    """
+    DEFAULT_SIZE = 4
+    DEFAULT_IDLE_TIMEOUT = timedelta(minutes=5)
+
+    def __init__(self, ssh_client, size: int = DEFAULT_SIZE,
+                 idle_timeout: timedelta = DEFAULT_IDLE_TIMEOUT):
+        if size < 1:
+            raise ValueError("SSH channel pool size must be greater than 0.")
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._ssh = ssh_client
+        self._idle = deque()
+        self._in_use = 0
+        self._lock = Lock()
+        self._slots = BoundedSemaphore(size)
+        self._refill = Event()
+        self._closed = False
+        self._worker = Thread(target=self.__keep_warm, daemon=True)
+        self._worker.start()
+
+    @contextmanager
+    def channel(self, timeout: float = None):
+        """Yields a channel, waits up to 'timeout' seconds for a free one if pool is full."""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No free SSH channel within {timeout} s, "
+                               f"all {self.size} channels are in use.")
+        try:
+            channel = self.__take()
+            try:
+                channel.settimeout(timeout)
+                yield channel
+            finally:
+                channel.close()
+                with self._lock:
+                    self._in_use -= 1
+                self._refill.set()
+        finally:
+            self._slots.release()
+
+    def warm_up(self):
+        self._refill.set()
+
+    def clear(self):
+        with self._lock:
+            channels = [channel for channel, _ in self._idle]
+            self._idle.clear()
+        for channel in channels:
+            channel.close()
+
+    def close(self):
+        self._closed = True
+        self._refill.set()
+        self.clear()
+
+    def __take(self):
+        with self._lock:
+            self._in_use += 1
+            while self._idle:
+                channel, _ = self._idle.popleft()
+                if channel.active and not channel.closed:
+                    return channel
+        try:
+            return self.__open()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+            raise
+
+    def __open(self):
+        transport = self._ssh.get_transport()
+        if transport is None or not transport.is_active():
+            raise ConnectionError("SSH transport is not active.")
+        return transport.open_session()
+
+    def __evict_idle(self):
+        deadline = datetime.now() - self.idle_timeout
+        with self._lock:
+            expired = [channel for channel, last_used in self._idle if last_used < deadline]
+            self._idle = deque(item for item in self._idle if item[1] >= deadline)
+        for channel in expired:
+            channel.close()
+
+    def __top_up(self):
+        while not self._closed:
+            with self._lock:
+                if len(self._idle) + self._in_use >= self.size:
+                    return
+            channel = self.__open()
+            with self._lock:
+                self._idle.append((channel, datetime.now()))
+
+    def __keep_warm(self):
+        while not self._closed:
+            used = self._refill.wait(self.idle_timeout.total_seconds())
+            self._refill.clear()
+            if self._closed:
+                break
+            try:
+                if used:
+                    self.__top_up()
+                else:
+                    self.__evict_idle()
+            except Exception:
+                # transport is down, channels will be opened again after reconnection
+                continue
+        self.clear()
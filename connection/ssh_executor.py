@@ -3,65 +3,163 @@
 # SPDX-License-Identifier: BSD-3-Clause-Clear
 #
 
+import os
 import socket
-import subprocess
+import tarfile
 from datetime import timedelta, datetime
 
 import paramiko
 
 from connection.base_executor import BaseExecutor
+from connection.reconnect import Backoff, ReconnectStats, is_port_open
+from connection.sftp_transfer import SftpTransfer
+from connection.shell_session import SshShellSession
+from connection.ssh_channel_pool import SshChannelPool
+from connection.tar_transfer import TarCompression, CountingStream, tar_source, \
+    remote_tar_source, tar_writer, tar_reader
 from core.test_run import TestRun
+from log.step_stats import sleep
 from test_utils.output import Output
 
 
 class SshExecutor(BaseExecutor):
-    def __init__(self, ip, username, password, port=22):
+    KEEPALIVE_INTERVAL = timedelta(seconds=5)
+
+    def __init__(self, ip, username, password, port=22,
+                 pool_size: int = SshChannelPool.DEFAULT_SIZE,
+                 pool_idle_timeout: timedelta = SshChannelPool.DEFAULT_IDLE_TIMEOUT):
+        super().__init__()
         self.ip = ip
         self.user = username
         self.password = password
+        self.port = port
         self.ssh = paramiko.SSHClient()
+        self.pool = SshChannelPool(self.ssh, pool_size, pool_idle_timeout)
+        self.transfer = SftpTransfer(self.ssh)
+        self.reconnect_stats = ReconnectStats()
         self.connect(username, password, port)
 
     def __del__(self):
+        self.pool.close()
         self.ssh.close()
 
     def connect(self, user, passwd, port, timeout: timedelta = timedelta(seconds=30)):
+        self.close_shell_session()
+        self.pool.clear()
         self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         try:
             self.ssh.connect(self.ip, username=user, password=passwd,
-                             port=port, timeout=timeout.total_seconds())
-        except (paramiko.SSHException, socket.timeout) as e:
+                             port=port, timeout=timeout.total_seconds(),
+                             banner_timeout=timeout.total_seconds(),
+                             auth_timeout=timeout.total_seconds())
+        except (paramiko.SSHException, socket.timeout, EOFError) as e:
             raise ConnectionError(f"An exception of type '{type(e)}' occurred while trying to "
                                   f"connect to {self.ip}\n{e}")
+        # dead connection is detected within a few keepalive intervals after DUT reboot
+        self.ssh.get_transport().set_keepalive(int(self.KEEPALIVE_INTERVAL.total_seconds()))
+        self.pool.warm_up()
 
     def disconnect(self):
         try:
+            self.close_shell_session()
+            self.pool.clear()
             self.ssh.close()
         except Exception:
             raise Exception(f"An exception occurred while trying to disconnect from {self.ip}")
 
     def _execute(self, command, timeout):
         try:
-            (stdin, stdout, stderr) = self.ssh.exec_command(command,
-                                                            timeout=timeout.total_seconds())
+            with self.pool.channel(timeout.total_seconds()) as channel:
+                channel.exec_command(command)
+                stdout = channel.makefile('rb')
+                stderr = channel.makefile_stderr('rb')
+                return Output(stdout.read(), stderr.read(), channel.recv_exit_status())
+        except paramiko.SSHException as e:
+            raise ConnectionError(f"An exception occurred while executing command '{command}' on"
+                                  f" {self.ip}\n{e}")
+
+    def _execute_stream(self, command, timeout):
+        deadline = datetime.now() + timeout
+        try:
+            with self.pool.channel(timeout.total_seconds()) as channel:
+                channel.exec_command(command)
+                while True:
+                    data_received = False
+                    if channel.recv_ready():
+                        data_received = True
+                        yield 'stdout', channel.recv(65536)
+                    if channel.recv_stderr_ready():
+                        data_received = True
+                        yield 'stderr', channel.recv_stderr(65536)
+                    if data_received:
+                        continue
+                    if channel.exit_status_ready():
+                        return channel.recv_exit_status()
+                    if datetime.now() > deadline:
+                        raise socket.timeout(f"Command '{command}' did not finish before timeout.")
+                    channel.status_event.wait(0.05)
         except paramiko.SSHException as e:
             raise ConnectionError(f"An exception occurred while executing command '{command}' on"
                                   f" {self.ip}\n{e}")
 
-        return Output(stdout.read(), stderr.read(), stdout.channel.recv_exit_status())
-
-    def rsync(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
-        options = []
-        if delete:
-            options.append("--delete")
-        subprocess.run(
-            f'sshpass -p "{self.password}" '
-            f'rsync -r -e "ssh -o UserKnownHostsFile=/dev/null -o StrictHostKeyChecking=no" '
-            f'{src} {self.user}@{self.ip}:{dst} {" ".join(options)}',
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=timeout.total_seconds())
+    def _open_shell_session(self):
+        return SshShellSession(self.ssh)
+
+    def _rsync(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+        stats = self.transfer.upload(src, dst, delete, timeout)
+        self.__add_transferred_bytes(stats.bytes)
+
+    def _rsync_from(self, src, dst, delete=False, timeout: timedelta = timedelta(seconds=30)):
+        stats = self.transfer.download(src, dst, delete, timeout)
+        self.__add_transferred_bytes(stats.bytes)
+
+    @staticmethod
+    def __add_transferred_bytes(transferred_bytes):
+        if TestRun.LOGGER is not None:
+            TestRun.LOGGER.add_step_stats(transferred_bytes=transferred_bytes)
+
+    def tar_to(self, src, dst, compression: TarCompression = TarCompression.gzip,
+               timeout: timedelta = timedelta(seconds=30)):
+        directory, member = tar_source(src)
+        start_time = datetime.now()
+        with self.pool.channel(timeout.total_seconds()) as channel:
+            channel.exec_command(f"mkdir -p {dst} && tar -x {compression.value} -C {dst}")
+            stream = CountingStream(channel.makefile('wb'))
+            with tar_writer(stream, compression) as tar:
+                tar.add(os.path.join(directory, member), arcname=member)
+            stream.flush()
+            channel.shutdown_write()
+            self.__check_tar_status(channel, f"Copy '{src}' to DUT '{dst}'", stream, start_time)
+
+    def tar_from(self, src, dst, compression: TarCompression = TarCompression.gzip,
+                 timeout: timedelta = timedelta(seconds=30)):
+        directory, member = remote_tar_source(src)
+        start_time = datetime.now()
+        os.makedirs(dst, exist_ok=True)
+        with self.pool.channel(timeout.total_seconds()) as channel:
+            channel.exec_command(f"tar -c {compression.value} -C {directory} {member}")
+            stream = CountingStream(channel.makefile('rb'))
+            try:
+                with tar_reader(stream, compression) as tar:
+                    tar.extractall(dst)
+            except tarfile.TarError:
+                # report remote tar error instead of truncated archive if there is one
+                self.__check_tar_status(channel, f"Copy '{src}' from DUT to '{dst}'", stream,
+                                        start_time)
+                raise
+            self.__check_tar_status(channel, f"Copy '{src}' from DUT to '{dst}'", stream,
+                                    start_time)
+
+    @staticmethod
+    def __check_tar_status(channel, description, stream, start_time):
+        exit_code = channel.recv_exit_status()
+        if exit_code != 0:
+            raise Exception(f"{description} as tar stream failed with exit code {exit_code}.\n"
+                            f"{channel.makefile_stderr('rb').read().decode(errors='replace')}")
+        seconds = (datetime.now() - start_time).total_seconds()
+        SshExecutor.__add_transferred_bytes(stream.bytes)
+        TestRun.LOGGER.debug(f"{description} as tar stream: {stream.bytes} B in {seconds:.2f} s "
+                             f"({stream.bytes / seconds / 2 ** 20 if seconds else 0:.2f} MiB/s)")
 
     def is_remote(self):
         return True
@@ -73,14 +171,45 @@ class SshExecutor(BaseExecutor):
         except Exception:
             return False
 
-    def wait_for_connection(self, timeout: timedelta = timedelta(minutes=10)):
+    def is_transport_alive(self, timeout: timedelta = timedelta(seconds=5)):
+        transport = self.ssh.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.open_session(timeout=timeout.total_seconds()).close()
+            return True
+        except Exception:
+            return False
+
+    def wait_for_connection(self, timeout: timedelta = timedelta(minutes=10),
+                            backoff: Backoff = None):
+        if self.is_transport_alive():
+            return
         TestRun.LOGGER.info("Waiting for DUT ssh connection...")
+        backoff = backoff or Backoff()
         start_time = datetime.now()
-        while start_time + timeout > datetime.now():
-            try:
-                self.connect(user=self.user, passwd=self.password, port=22)
-                break
-            except ConnectionError:
-                continue
-            except Exception:
-                continue
+        deadline = start_time + timeout
+        attempts = 0
+        last_error = None
+        while True:
+            remaining = deadline - datetime.now()
+            if remaining <= timedelta():
+                raise ConnectionError(f"Unable to connect to {self.ip} within "
+                                      f"{timeout.total_seconds()} s.\n{last_error}")
+            attempts += 1
+            probe_timeout = min(remaining, timedelta(seconds=1))
+            if is_port_open(self.ip, self.port, probe_timeout):
+                try:
+                    self.connect(self.user, self.password, self.port,
+                                 min(remaining, timedelta(seconds=30)))
+                    break
+                except (OSError, paramiko.SSHException) as e:
+                    last_error = e
+            else:
+                last_error = f"Port {self.port} is not reachable."
+            delay = backoff.next_delay()
+            sleep(max(0, min(delay, (deadline - datetime.now()).total_seconds())))
+        self.reconnect_stats.record(datetime.now() - start_time, attempts)
+        TestRun.LOGGER.info(f"DUT ssh connection established after "
+                            f"{(datetime.now() - start_time).total_seconds():.2f} s "
+                            f"({attempts} attempts). {self.reconnect_stats}")
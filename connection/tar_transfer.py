@@ -0,0 +1,84 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import os
+import posixpath
+import tarfile
+from contextlib import contextmanager
+from enum import Enum
+
+
+class TarCompression(Enum):
+    none = ''
+    gzip = '--gzip'
+    zstd = '--zstd'
+
+
+class CountingStream:
+    def __init__(self, stream):
+        self._stream = stream
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        return self._stream.write(data)
+
+    def read(self, size=-1):
+        data = self._stream.read(size)
+        self.bytes += len(data)
+        return data
+
+    def flush(self):
+        self._stream.flush()
+
+
+def tar_source(path, path_module=os.path):
+    """
+    Returns (directory, member) pair used to archive 'path' with rsync semantics:
+    trailing '/' means directory content, otherwise the directory itself.
+    """
+    if path.endswith('/'):
+        return path, '.'
+    return path_module.dirname(path) or '.', path_module.basename(path)
+
+
+def remote_tar_source(path):
+    return tar_source(path, posixpath)
+
+
+def count_files(path, limit):
+    """Counts files in local directory tree, stops counting after exceeding 'limit'."""
+    count = 0
+    for _, _, file_names in os.walk(path):
+        count += len(file_names)
+        if count > limit:
+            break
+    return count
+
+
+@contextmanager
+def tar_writer(stream, compression: TarCompression):
+    if compression == TarCompression.zstd:
+        import zstandard
+        compressed = zstandard.ZstdCompressor().stream_writer(stream, closefd=False)
+        with tarfile.open(fileobj=compressed, mode='w|') as tar:
+            yield tar
+        compressed.close()
+    else:
+        mode = 'w|gz' if compression == TarCompression.gzip else 'w|'
+        with tarfile.open(fileobj=stream, mode=mode) as tar:
+            yield tar
+
+
+@contextmanager
+def tar_reader(stream, compression: TarCompression):
+    if compression == TarCompression.zstd:
+        import zstandard
+        stream = zstandard.ZstdDecompressor().stream_reader(stream)
+        mode = 'r|'
+    else:
+        mode = 'r|gz' if compression == TarCompression.gzip else 'r|'
+    with tarfile.open(fileobj=stream, mode=mode) as tar:
+        yield tar
@@ -4,6 +4,8 @@
 #
 
 
+from datetime import timedelta
+
 import pytest
 from IPy import IP
 
@@ -84,10 +86,17 @@ def __setup(cls, dut_config):
         except ValueError:
             raise Exception("IP address from configuration file is in invalid format.")
         if 'user' in dut_config and 'password' in dut_config:
+            pool_config = {}
+            if 'ssh_pool_size' in dut_config:
+                pool_config['pool_size'] = int(dut_config['ssh_pool_size'])
+            if 'ssh_pool_idle_timeout' in dut_config:
+                pool_config['pool_idle_timeout'] = timedelta(
+                    seconds=int(dut_config['ssh_pool_idle_timeout']))
             cls.executor = SshExecutor(
                 dut_config['ip'],
                 dut_config['user'],
-                dut_config['password']
+                dut_config['password'],
+                **pool_config
             )
         else:
             raise Exception("There is no credentials in config file.")
@@ -96,6 +105,12 @@ def __setup(cls, dut_config):
     else:
         raise Exception("Invalid DUT type")
 
+    if 'persistent_shell' in dut_config and dut_config['persistent_shell']:
+        cls.executor.enable_shell_session()
+
+    if 'command_cache' in dut_config and dut_config['command_cache']:
+        cls.executor.enable_cache()
+
     if list(cls.item.iter_markers(name="remote_only")):
         if not cls.executor.is_remote():
             pytest.skip()
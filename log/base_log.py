@@ -4,7 +4,7 @@
 #
 
 from enum import Enum
-from re import sub
+from log.log_sanitizer import sanitize
 
 
 class BaseLogResult(Enum):
@@ -19,8 +19,23 @@ class BaseLogResult(Enum):
     CRITICAL = 18
 
 
+class LinkedMessage(str):
+    """Message shown in html log together with a link, e.g. to a file with more details."""
+
+    def __new__(cls, text, link, link_text):
+        message = super().__new__(cls, text)
+        message.link = link
+        message.link_text = link_text
+        return message
+
+    def with_text(self, text):
+        return LinkedMessage(text, self.link, self.link_text)
+
+
 def escape(msg):
-    return sub(u'[^\u0020-\uD7FF\u0009\u000A\u000D\uE000-\uFFFD\U00010000-\U0010FFFF]+', '', msg)
+    escaped = sanitize(msg)
+    # type of message selects presentation policy, so it has to be kept
+    return msg.with_text(escaped) if isinstance(msg, LinkedMessage) else escaped
 
 
 class BaseLog():
@@ -0,0 +1,107 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import atexit
+from datetime import timedelta
+from queue import Queue, Empty
+from threading import Event, Lock, Thread
+
+from test_utils.file_locker import lock_file
+
+
+class CommandLogWriter:
+    """
+    Appends lines to the command log file from a background thread. Lines are queued in
+    the order of write() calls, so command and its output keep their order, and written
+    in batches under one file lock. Queue is bounded, a writer waits when it is full.
+    Pending lines are written on flush(), close() and at interpreter exit. In synchronous
+    mode every line is written before write() returns. Error of writing in background is
+    raised by the next flush() or close().
+    """
+    QUEUE_SIZE = 10000
+    BATCH_SIZE = 1000
+    FLUSH_INTERVAL = timedelta(milliseconds=200)
+
+    def __init__(self, path, synchronous: bool = False, queue_size: int = QUEUE_SIZE):
+        self.path = path
+        self._synchronous = synchronous
+        self._queue = Queue(maxsize=queue_size)
+        self._file_lock = Lock()
+        self._closed = False
+        self._error = None
+        self._thread = Thread(target=self.__run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def synchronous(self):
+        return self._synchronous
+
+    @synchronous.setter
+    def synchronous(self, value: bool):
+        if value:
+            self.flush()
+        self._synchronous = value
+
+    def write(self, line):
+        if self._synchronous or self._closed:
+            self.__write_lines([line])
+        else:
+            self._queue.put(line)
+
+    def flush(self, timeout: timedelta = timedelta(seconds=30)):
+        if self._closed:
+            return
+        self.__flush(timeout)
+        self.__raise_error()
+
+    def close(self):
+        if self._closed:
+            return
+        self.__flush(timedelta(seconds=30))
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
+        self.__raise_error()
+
+    def __flush(self, timeout):
+        flushed = Event()
+        self._queue.put(flushed)
+        flushed.wait(timeout.total_seconds())
+
+    def __raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise Exception(f"Unable to write to command log {self.path}: {error}") from error
+
+    def __run(self):
+        while True:
+            try:
+                items = [self._queue.get(timeout=self.FLUSH_INTERVAL.total_seconds())]
+            except Empty:
+                continue
+            while len(items) < self.BATCH_SIZE:
+                try:
+                    items.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            lines = [item for item in items if isinstance(item, str)]
+            if lines:
+                try:
+                    self.__write_lines(lines)
+                except Exception as e:
+                    # lines are lost, error is raised by flush() or close()
+                    self._error = e
+            for item in items:
+                if isinstance(item, Event):
+                    item.set()
+            if None in items:
+                return
+
+    def __write_lines(self, lines):
+        with self._file_lock, open(self.path, "ab+") as command_log:
+            with lock_file(command_log):
+                command_log.write("".join(lines).encode())
@@ -0,0 +1,231 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import json
+import os
+import struct
+from datetime import timedelta
+from enum import Enum
+from threading import Lock, local
+from time import monotonic, time
+
+
+class EventType(Enum):
+    begin = 1
+    end = 2
+    iteration_start = 3
+    iteration_end = 4
+    group_start = 5
+    group_end = 6
+    step = 7
+    command = 8
+    output = 9
+
+
+FAILURE_LEVELS = ('error', 'blocked', 'exception', 'critical')
+
+
+class EventLog:
+    """
+    Structured log of a test run. Every event is written as one JSON line to 'events.jsonl'.
+    'events.idx' holds one fixed size entry per event (sequence number, timestamp, offset
+    and length of the line, event type), so events can be found by binary search without
+    parsing the data file. 'failures.idx' holds index entries of failed steps only.
+    """
+    DATA_FILE = 'events.jsonl'
+    INDEX_FILE = 'events.idx'
+    FAILURES_FILE = 'failures.idx'
+    INDEX_ENTRY = struct.Struct('<QdQIB')
+    FLUSH_INTERVAL = timedelta(seconds=1)
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._data = open(os.path.join(directory, self.DATA_FILE), 'ab')
+        self._index = open(os.path.join(directory, self.INDEX_FILE), 'ab')
+        self._failures = open(os.path.join(directory, self.FAILURES_FILE), 'ab')
+        self._offset = self._data.tell()
+        self._seq = self._index.tell() // self.INDEX_ENTRY.size
+        self._lock = Lock()
+        self._last_flush = monotonic()
+        # open groups and iteration are tracked per thread, iterations may run in parallel
+        self._local = local()
+
+    @property
+    def _groups(self):
+        if not hasattr(self._local, 'groups'):
+            self._local.groups = []
+        return self._local.groups
+
+    @property
+    def _iteration(self):
+        return getattr(self._local, 'iteration', None)
+
+    def begin(self, message):
+        self.add(EventType.begin, msg=message)
+
+    def end(self, result):
+        self.__end_groups()
+        self.add(EventType.end, result=result.name)
+        self.close()
+
+    def start_iteration(self, message):
+        self._local.setup_groups, self._local.groups = self._groups, []
+        self._local.iteration = message
+        self.add(EventType.iteration_start, msg=message)
+
+    def end_iteration(self, result):
+        self.__end_groups()
+        self.add(EventType.iteration_end, msg=self._iteration, result=result.name)
+        self._local.groups, self._local.setup_groups = \
+            getattr(self._local, 'setup_groups', []), []
+        self._local.iteration = None
+
+    def start_group(self, message):
+        self.add(EventType.group_start, msg=message)
+        self._groups.append(message)
+
+    def end_group(self):
+        if self._groups:
+            self.add(EventType.group_end, msg=self._groups.pop())
+
+    def end_all_groups(self):
+        self.__end_groups()
+
+    def step(self, level, message):
+        self.add(EventType.step, level=level, msg=message)
+
+    def command(self, command_id, command):
+        self.add(EventType.command, id=command_id, command=command)
+
+    def output(self, command_id, output):
+        if output is None:
+            self.add(EventType.output, id=command_id)
+        else:
+            self.add(EventType.output, id=command_id, exit_code=output.exit_code,
+                     stdout=output.stdout, stderr=output.stderr)
+
+    def add(self, event_type: EventType, **fields):
+        with self._lock:
+            if self._data.closed:
+                return
+            timestamp = time()
+            record = {'seq': self._seq, 'time': timestamp, 'type': event_type.name}
+            if self._iteration is not None:
+                record['iteration'] = self._iteration
+            if self._groups:
+                record['group'] = self._groups
+            record.update(fields)
+            line = json.dumps(record, default=str).encode() + b'\n'
+            entry = self.INDEX_ENTRY.pack(
+                self._seq, timestamp, self._offset, len(line), event_type.value)
+            self._data.write(line)
+            self._index.write(entry)
+            if fields.get('level') in FAILURE_LEVELS:
+                self._failures.write(entry)
+                self.__flush()
+            self._offset += len(line)
+            self._seq += 1
+            if monotonic() - self._last_flush > self.FLUSH_INTERVAL.total_seconds():
+                self.__flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._data.closed:
+                self.__flush()
+
+    def close(self):
+        with self._lock:
+            if not self._data.closed:
+                self.__flush()
+                for file in (self._data, self._index, self._failures):
+                    file.close()
+
+    def __end_groups(self):
+        while self._groups:
+            self.end_group()
+
+    def __flush(self):
+        # index entries must never point past the data written to disk
+        self._data.flush()
+        self._index.flush()
+        self._failures.flush()
+        self._last_flush = monotonic()
+
+
+class EventLogReader:
+    def __init__(self, directory):
+        self.directory = directory
+        self._data = open(os.path.join(directory, EventLog.DATA_FILE), 'rb')
+        self._index = open(os.path.join(directory, EventLog.INDEX_FILE), 'rb')
+        self._failures_path = os.path.join(directory, EventLog.FAILURES_FILE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+    def __len__(self):
+        self._index.seek(0, os.SEEK_END)
+        return self._index.tell() // EventLog.INDEX_ENTRY.size
+
+    def entry(self, position):
+        """Returns (seq, time, offset, length, event type) index entry."""
+        self._index.seek(position * EventLog.INDEX_ENTRY.size)
+        seq, timestamp, offset, length, event_type = EventLog.INDEX_ENTRY.unpack(
+            self._index.read(EventLog.INDEX_ENTRY.size))
+        return seq, timestamp, offset, length, EventType(event_type)
+
+    def read(self, entry):
+        _, _, offset, length, _ = entry
+        self._data.seek(offset)
+        return json.loads(self._data.read(length))
+
+    def event(self, position):
+        return self.read(self.entry(position))
+
+    def result(self):
+        """Returns test result or None if the run did not finish."""
+        count = len(self)
+        if count == 0:
+            return None
+        entry = self.entry(count - 1)
+        return self.read(entry)['result'] if entry[4] == EventType.end else None
+
+    def test_name(self):
+        return self.event(0)['msg'] if len(self) else None
+
+    def failures(self):
+        if not os.path.exists(self._failures_path):
+            return
+        with open(self._failures_path, 'rb') as failures:
+            for entry in EventLog.INDEX_ENTRY.iter_unpack(failures.read()):
+                yield self.read(entry[:4] + (EventType(entry[4]),))
+
+    def find(self, timestamp: float):
+        """Returns position of the first event logged at or after 'timestamp'."""
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.entry(middle)[1] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def events(self, start: float = None, stop: float = None, types=None):
+        position = self.find(start) if start is not None else 0
+        count = len(self)
+        while position < count:
+            entry = self.entry(position)
+            if stop is not None and entry[1] >= stop:
+                break
+            if types is None or entry[4] in types:
+                yield self.read(entry)
+            position += 1
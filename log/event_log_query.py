@@ -0,0 +1,76 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import argparse
+import os
+from datetime import datetime
+
+from log.event_log import EventLog, EventLogReader, EventType
+
+
+def find_runs(base_dir):
+    """Yields directories with event logs under 'base_dir' (<test title>/<timestamp>)."""
+    for root, dirs, files in os.walk(base_dir):
+        if EventLog.INDEX_FILE in files:
+            dirs.clear()
+            yield root
+
+
+def parse_time(value):
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+def format_event(event):
+    timestamp = datetime.fromtimestamp(event['time']).strftime("%Y-%m-%d %H:%M:%S.%f")
+    location = " / ".join(
+        ([event['iteration']] if 'iteration' in event else []) + event.get('group', []))
+    if event['type'] == EventType.step.name:
+        text = f"{event['level'].upper()}: {event['msg']}"
+    elif event['type'] == EventType.command.name:
+        text = f"command {event['id']}: {event['command']}"
+    elif event['type'] == EventType.output.name:
+        text = f"output {event['id']}: exit code {event.get('exit_code')}"
+    else:
+        text = f"{event['type']}: {event.get('msg', '')} {event.get('result', '')}".rstrip()
+    return f"[{timestamp}] {f'[{location}] ' if location else ''}{text}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query structured event logs of test runs stored under log base dir.")
+    parser.add_argument("base_dir", help="log base directory or single run directory")
+    parser.add_argument("--test", help="show only runs of tests containing this text")
+    parser.add_argument("--result", help="show only runs with this result (e.g. FAILED)")
+    parser.add_argument("--failures", action="store_true", help="show failed steps")
+    parser.add_argument("--events", action="store_true", help="show events")
+    parser.add_argument("--since", help="show events logged since 'YYYY-MM-DD HH:MM:SS'")
+    parser.add_argument("--until", help="show events logged until 'YYYY-MM-DD HH:MM:SS'")
+    parser.add_argument("--type", action="append", choices=[t.name for t in EventType],
+                        help="show only events of this type, can be given many times")
+    args = parser.parse_args()
+
+    start = parse_time(args.since) if args.since else None
+    stop = parse_time(args.until) if args.until else None
+    types = [EventType[name] for name in args.type] if args.type else None
+
+    for run in sorted(find_runs(args.base_dir)):
+        with EventLogReader(run) as reader:
+            test_name = reader.test_name()
+            result = reader.result() or "NOT FINISHED"
+            if args.test and (test_name is None or args.test not in test_name):
+                continue
+            if args.result and result != args.result.upper():
+                continue
+            print(f"{run}: {test_name} {result}")
+            if args.failures:
+                for event in reader.failures():
+                    print(f"    {format_event(event)}")
+            if args.events or start is not None or stop is not None or types is not None:
+                for event in reader.events(start, stop, types):
+                    print(f"    {format_event(event)}")
+
+
+if __name__ == "__main__":
+    main()
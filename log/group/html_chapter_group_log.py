@@ -5,6 +5,7 @@
 
 from log.base_log import BaseLogResult, BaseLog
 from log.group.html_group_log import HtmlGroupLog
+from log.step_stats import StepStats
 from datetime import datetime
 
 
@@ -21,6 +22,7 @@ class HtmlChapterGroupLog(HtmlGroupLog):
 
     def __init__(self, html_base, cfg, begin_msg=None, id='ch0'):
         super().__init__(HtmlChapterGroupLog._factory, html_base, cfg, begin_msg, id)
+        self.stats = StepStats()
 
     @staticmethod
     def _factory(html_base, cfg, begin_msg, id):
@@ -31,6 +33,12 @@ class HtmlChapterGroupLog(HtmlGroupLog):
         ref_container_id = ref_group._container.get('id')
         group._header.set('ondblclick', f"chapterClick('{ref_container_id}')")
 
+    def add_stats(self, **values):
+        # every open group is charged, so parent group stats include its subgroups
+        self.stats.add(**values)
+        if self._successor is not None:
+            self._successor.add_stats(**values)
+
     def set_result(self, result):
         if self._successor is not None:
             self._successor.set_result(result)
@@ -38,6 +46,7 @@ class HtmlChapterGroupLog(HtmlGroupLog):
 
     def end(self):
         result = super().end()
+        self.stats.end()
         exe_time = (datetime.now() - self._start_time).seconds
-        self._cfg.group_chapter_end(exe_time, self._header, self._container, result)
+        self._cfg.group_chapter_end(exe_time, self._header, self._container, result, self.stats)
         return result
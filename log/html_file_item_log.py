@@ -4,6 +4,7 @@
 #
 
 from log.html_file_log import HtmlFileLog
+from log.log_sanitizer import sanitize
 from log.group.html_chapter_group_log import HtmlChapterGroupLog
 from log.group.html_iteration_group_log import HtmlIterationGroupLog
 from datetime import datetime
@@ -12,24 +13,30 @@ from lxml.etree import Element
 
 class HtmlFileItemLog(HtmlFileLog):
     def __init__(self, html_file_path, test_title, cfg, iteration_title="Test summary"):
-        super().__init__(html_file_path, test_title)
+        test_title = sanitize(test_title)
+        iteration_title = sanitize(iteration_title)
+        super().__init__(html_file_path, test_title, cfg.streaming)
         root = self.get_root()
-        self._log_items_store = root.xpath('/html/body')[0]
+        self._log_items_store = self.get_nodes('/html/body')[0]
         self._idx = 0
-        self._log_chapters_store = root.xpath('/html/body/section[@id="iteration-chapters"]')[0]
+        self._log_chapters_store = self.get_nodes(
+            '/html/body/section[@id="iteration-chapters"]')[0]
         self._chapter_group = HtmlChapterGroupLog(self._log_chapters_store, cfg, test_title)
         self._main_group = HtmlIterationGroupLog(self._log_items_store, cfg, test_title)
         self._start_time = datetime.now()
+        self.execution_time = None
         iteration_title_node = root.xpath('/html/body/a/h1')[0]
         iteration_title_node.text = iteration_title
         self._config = cfg
-        self._fail_container = root.xpath('/html/body/div/select[@id="error-list-selector"]')[0]
+        self._fail_container = self.get_nodes(
+            '/html/body/div/select[@id="error-list-selector"]')[0]
 
     def __add_error(self, msg_idx, msg, error_class):
         fail_element = Element('option', value=msg_idx)
         fail_element.set('class', error_class)
         fail_element.text = msg
         self._fail_container.append(fail_element)
+        self.flush()
 
     def start_iteration(self, message):
         super().begin(message)
@@ -38,6 +45,7 @@ class HtmlFileItemLog(HtmlFileLog):
         return self._main_group.get_result()
 
     def begin(self, message):
+        super().begin(message)
         self._chapter_group.begin(message)
         self._main_group.begin(message)
 
@@ -76,6 +84,9 @@ class HtmlFileItemLog(HtmlFileLog):
         self.__add_error(msg_idx, message, "critical")
         self._main_group.critical(message)
 
+    def add_step_stats(self, **values):
+        self._chapter_group.add_stats(**values)
+
     def start_group(self, message):
         self._chapter_group.start_group(message)
         self._main_group.start_group(message)
@@ -94,9 +105,9 @@ class HtmlFileItemLog(HtmlFileLog):
         while self._main_group._successor is not None:
             self.end_group()
         self.end_group()
-        time_result = datetime.now() - self._start_time
-        time_node = self.get_root().xpath('/html/body/div[@class="iteration-execution-time"]')[0]
-        status_node = self.get_root().xpath('/html/body/div[@class="iteration-status"]')[0]
+        self.execution_time = datetime.now() - self._start_time
+        time_node = self.get_nodes('/html/body/div[@class="iteration-execution-time"]')[0]
+        status_node = self.get_nodes('/html/body/div[@class="iteration-status"]')[0]
         self._config.end_iteration_func(
-            time_node, status_node, time_result.total_seconds(), self.get_result())
+            time_node, status_node, self.execution_time.total_seconds(), self.get_result())
         super().end()
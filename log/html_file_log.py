@@ -3,19 +3,26 @@
 # SPDX-License-Identifier: BSD-3-Clause-Clear
 #
 
+import os
+from threading import Lock
 from log.base_log import BaseLog
+from log.html_stream_writer import HtmlStreamWriter
+from lxml.etree import Element
 from lxml.html import fromstring
 from lxml.html import tostring
 
 
 class HtmlFileLog(BaseLog):
-    def __init__(self, file_path, title):
+    def __init__(self, file_path, title, streaming: bool = False):
         super().__init__(title)
         self.__path = file_path
         with open(file_path) as file_stream:
             self.__root = fromstring(file_stream.read())
         node_list = self.__root.xpath('/html/head/title')
         node_list[0].text = title
+        self.__stream = HtmlStreamWriter(file_path) if streaming else None
+        self.__write_lock = Lock()
+        self.__ended = False
 
     def get_path(self):
         return self.__path
@@ -23,7 +30,60 @@ class HtmlFileLog(BaseLog):
     def get_root(self):
         return self.__root
 
+    def get_nodes(self, xpath):
+        """
+        Returns nodes of the page. When the page is streamed, changes of returned nodes
+        are written to the records file instead of being kept in memory.
+        """
+        nodes = self.__root.xpath(xpath)
+        if self.__stream is None:
+            return nodes
+        return [self.__stream.node(node) for node in nodes]
+
+    def begin(self, message):
+        if self.__stream is not None:
+            self.__write_skeleton()
+
+    def flush(self):
+        if self.__stream is not None:
+            self.__stream.flush()
+
+    def snapshot(self):
+        """Serialized page for write_checkpoint(), streamed pages are not serialized."""
+        return None if self.__stream is not None else tostring(self.__root)
+
+    def write_checkpoint(self, snapshot):
+        if self.__stream is not None:
+            self.__stream.flush()
+            return
+        with self.__write_lock:
+            # checkpoint taken before the end must not overwrite the final page
+            if not self.__ended:
+                self.__write(snapshot)
+
     def end(self):
+        if self.__stream is not None:
+            self.__stream.close()
+            return
+        with self.__write_lock:
+            self.__write(tostring(self.__root))
+            self.__ended = True
+
+    def __write(self, page):
+        temporary_path = f"{self.__path}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(page)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.__path)
+
+    def __write_skeleton(self):
+        # page is written once, records are replayed on it by main.js
+        for element in self.__root.iter():
+            if isinstance(element.tag, str) and element.get('data-sid') is None:
+                self.__stream.node(element)
+        records_script = Element('script', src=os.path.basename(self.__stream.path))
+        self.__root.xpath('/html/body')[0].append(records_script)
         with open(self.__path, "wb") as file:
-            x = tostring(self.__root)
-            file.write(x)
+            file.write(tostring(self.__root))
+        records_script.getparent().remove(records_script)
@@ -8,6 +8,23 @@ from log.html_file_item_log import HtmlFileItemLog
 
 class HtmlIterationLog(HtmlFileItemLog):
     def __init__(self, test_title, iteration_title, config):
-        self.iteration_closed: bool = False
-        html_file = config.create_iteration_file()
+        self.iteration_id, html_file = config.create_iteration()
         super().__init__(html_file, test_title, config, iteration_title)
+        self.iteration_title = iteration_title
+
+    def summary(self):
+        return IterationSummary(self.iteration_id, self.iteration_title, self.get_result(),
+                                self.execution_time)
+
+
+class IterationSummary:
+    """Kept for finished iteration instead of its log, which is released after writing."""
+
+    def __init__(self, iteration_id, title, result, execution_time):
+        self.iteration_id = iteration_id
+        self.title = title
+        self.result = result
+        self.execution_time = execution_time
+
+    def get_result(self):
+        return self.result
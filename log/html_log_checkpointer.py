@@ -0,0 +1,79 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import logging
+from datetime import timedelta
+from threading import Event, Lock, Thread
+
+
+class HtmlLogCheckpointer:
+    """
+    Writes html log pages changed since the last checkpoint from a background thread,
+    every 'interval' and after every 'step_count' logged steps, so a killed test leaves
+    readable log instead of empty templates. Pages are serialized under the lock of log
+    manager and written to files outside of it, each one atomically (write and rename).
+    Checkpoints are taken one at a time, so an older snapshot never replaces a newer one.
+    Only pages marked as changed are written, so cost does not grow with number of pages.
+    """
+    DEFAULT_INTERVAL = timedelta(seconds=30)
+
+    def __init__(self, lock, interval: timedelta = DEFAULT_INTERVAL, step_count: int = None):
+        self.interval = interval
+        self.step_count = step_count
+        self.checkpoints = 0
+        self.written_pages = 0
+        self._lock = lock
+        self._checkpoint_lock = Lock()
+        self._dirty = {}
+        self._steps = 0
+        self._wake_up = Event()
+        self._stopped = False
+        self._thread = Thread(target=self.__run, name="html-log-checkpointer", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, *logs):
+        """Marks pages as changed by one logged step. Called under the lock of log manager."""
+        for log in logs:
+            self._dirty[id(log)] = log
+        self._steps += 1
+        if self.step_count is not None and self._steps >= self.step_count:
+            self._wake_up.set()
+
+    def forget(self, log):
+        """Drops page which is written by its log (e.g. at the end of iteration)."""
+        self._dirty.pop(id(log), None)
+
+    def checkpoint(self):
+        """Must not be called under the lock of log manager."""
+        with self._checkpoint_lock:
+            with self._lock:
+                logs = list(self._dirty.values())
+                self._dirty.clear()
+                self._steps = 0
+                snapshots = [(log, log.snapshot()) for log in logs]
+            for log, snapshot in snapshots:
+                log.write_checkpoint(snapshot)
+            self.checkpoints += 1
+            self.written_pages += len(snapshots)
+
+    def stop(self):
+        if self._stopped:
+            return
+        self._stopped = True
+        self._wake_up.set()
+        self._thread.join()
+
+    def __run(self):
+        timeout = None if self.interval is None else self.interval.total_seconds()
+        while True:
+            self._wake_up.wait(timeout)
+            self._wake_up.clear()
+            if self._stopped:
+                return
+            try:
+                self.checkpoint()
+            except Exception as e:
+                # not logged to html log, it is the log which cannot be written
+                logging.getLogger(__name__).error(f"Unable to checkpoint html log: {e}")
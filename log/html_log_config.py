@@ -3,12 +3,16 @@
 # SPDX-License-Identifier: BSD-3-Clause-Clear
 #
 
+import json
 import os
 from os import path, environ, makedirs
-from datetime import datetime
+from datetime import datetime, timedelta
 from shutil import copyfile
+from threading import Lock
 from lxml.etree import Element
-from log.base_log import BaseLogResult
+from log.base_log import BaseLogResult, LinkedMessage
+from log.html_stream_writer import stream_policy
+from log.log_filter import LogFilter
 from log.presentation_policy import null_policy
 
 
@@ -43,14 +47,29 @@ class HtmlLogConfig:
     CSS = __MAIN + '.css'
     JS = __MAIN + '.js'
 
+    ITERATIONS = 'iterations.js'
     ITERATION_FOLDER = 'iterations'
     SETUP = __SETUP + ".html"
 
-    def iteration(self):
-        return f'{HtmlLogConfig.__T_ITERATION}_{str(self._iteration_id).zfill(3)}.html'
+    def iteration(self, iteration_id=None):
+        if iteration_id is None:
+            iteration_id = self._iteration_id
+        return f'{HtmlLogConfig.__T_ITERATION}_{str(iteration_id).zfill(3)}.html'
 
-    def __init__(self, base_dir=None, presentation_policy=null_policy):
+    def __init__(self, base_dir=None, presentation_policy=null_policy, streaming: bool = False,
+                 event_log: bool = True, log_filter: LogFilter = None,
+                 checkpoint_interval: timedelta = timedelta(seconds=30),
+                 checkpoint_steps: int = None):
         self._log_base_dir = base_dir
+        # write log pages incrementally instead of keeping them in memory until the end
+        self.streaming = streaming
+        # write structured, indexed log of all events next to html log
+        self.event_log = event_log
+        self.log_filter = LogFilter() if log_filter is None else log_filter
+        # write changed log pages periodically, so they survive a crash of the test,
+        # None for both disables checkpoints
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_steps = checkpoint_steps
         if base_dir is None:
             if os.name == 'nt':
                 self._log_base_dir = 'c:\\History'
@@ -62,7 +81,9 @@ class HtmlLogConfig:
         self._log_dir = None
         self._presentation_policy = {}
         self.register_presentation_policy(str, presentation_policy)
+        self.register_presentation_policy(LinkedMessage, presentation_policy)
         self._iteration_id = 0
+        self._iteration_lock = Lock()
 
     def get_iteration_id(self):
         return self._iteration_id
@@ -75,6 +96,8 @@ class HtmlLogConfig:
             yield policy
 
     def register_presentation_policy(self, type, presentation_policy):
+        if self.streaming:
+            presentation_policy = stream_policy(presentation_policy)
         self._presentation_policy[type] = presentation_policy
 
     def __find_template_file(self, name, relative_path=None):
@@ -115,6 +138,7 @@ class HtmlLogConfig:
         copyfile(main_html, path.join(self._log_dir, HtmlLogConfig.MAIN))
         copyfile(main_css, path.join(self._log_dir, HtmlLogConfig.CSS))
         copyfile(main_js, path.join(self._log_dir, HtmlLogConfig.JS))
+        open(path.join(self._log_dir, HtmlLogConfig.ITERATIONS), 'w').close()
         copyfile(self._get_setup_template_file_path(), path.join(additional_location,
                                                                  HtmlLogConfig.SETUP))
         return self._log_dir
@@ -122,38 +146,35 @@ class HtmlLogConfig:
     def get_main_file_path(self):
         return path.join(self._log_dir, HtmlLogConfig.MAIN)
 
+    def get_iterations_file_path(self):
+        return path.join(self._log_dir, HtmlLogConfig.ITERATIONS)
+
     def get_setup_file_path(self):
         return path.join(self._log_dir, HtmlLogConfig.ITERATION_FOLDER, HtmlLogConfig.SETUP)
 
     def create_iteration_file(self):
-        self._iteration_id += 1
+        return self.create_iteration()[1]
+
+    def create_iteration(self):
+        """Returns id and file path of a new iteration, iterations may be created in parallel."""
+        with self._iteration_lock:
+            self._iteration_id += 1
+            iteration_id = self._iteration_id
         template_file = self.__get_iteration_template_path()
-        new_file_name = self.iteration()
+        new_file_name = self.iteration(iteration_id)
         result = path.join(self._log_dir, HtmlLogConfig.ITERATION_FOLDER, new_file_name)
         copyfile(template_file, result)
-        return result
-
-    def end_iteration(self,
-                      iteration_selector_div,
-                      iteration_selector_select,
-                      iteration_id,
-                      iteration_result):
-        style = "iteration-selector"
-        if iteration_result != BaseLogResult.PASSED:
-            style = f'{style} {HtmlLogConfig.STYLE[iteration_result]}'
-        if iteration_id and iteration_id % 8 == 0:
-            new_element = Element("br")
-            iteration_selector_div[0].append(new_element)
-        new_element = Element("a")
-        new_element.set('class', style)
-        new_element.set('onclick', f"selectIteration('{iteration_id}')")
-        new_element.text = str(iteration_id)
-        iteration_selector_div[0].append(new_element)
-        new_element = Element('option', value=f"{iteration_id}")
-        new_element.text = 'iteration_' + str(iteration_id).zfill(3)
-        if iteration_result != BaseLogResult.PASSED:
-            new_element.set('class', HtmlLogConfig.STYLE[iteration_result])
-        iteration_selector_select.append(new_element)
+        return iteration_id, result
+
+    def end_iteration(self, iterations_file, iteration_summary):
+        style = ''
+        if iteration_summary.result != BaseLogResult.PASSED:
+            style = HtmlLogConfig.STYLE[iteration_summary.result]
+        record = [iteration_summary.iteration_id,
+                  iteration_summary.title,
+                  style,
+                  convert_seconds_to_str(round(iteration_summary.execution_time.total_seconds()))]
+        iterations_file.write(f"logIteration({json.dumps(record)});\n")
 
     def end_setup_iteration(self, iteration_selector_div, iteration_selector_select, log_result):
         if log_result != BaseLogResult.PASSED:
@@ -190,11 +211,17 @@ class HtmlLogConfig:
         html_header.set('class', div_style)
         html_container.set('class', ul_style)
 
-    def group_chapter_end(self, time_in_sec, html_header, html_container, log_result):
+    def group_chapter_end(self, time_in_sec, html_header, html_container, log_result,
+                          stats=None):
         sub_element = Element('a')
         sub_element.text = convert_seconds_to_str(time_in_sec)
         sub_element.set('class', 'top-marker')
         html_header.append(sub_element)
+        if stats is not None:
+            sub_element = Element('a')
+            sub_element.text = f"[{stats}]"
+            sub_element.set('class', 'step-stats')
+            html_header.append(sub_element)
         div_style = 'test-group-step'
         ul_style = 'iteration-content'
         if log_result != BaseLogResult.PASSED:
@@ -3,8 +3,12 @@
 # SPDX-License-Identifier: BSD-3-Clause-Clear
 #
 
+import os
+from threading import RLock, local
 
-from log.base_log import BaseLog, escape
+from log.base_log import BaseLog, BaseLogResult, escape
+from log.event_log import EventLog
+from log.html_log_checkpointer import HtmlLogCheckpointer
 from log.html_log_config import HtmlLogConfig
 from log.html_main_log import HtmlMainLog
 from log.html_setup_log import HtmlSetupLog
@@ -12,116 +16,229 @@ from log.html_iteration_log import HtmlIterationLog
 
 
 class HtmlLogManager(BaseLog):
+    """
+    Iterations may run in parallel threads. Each thread has its own current iteration,
+    messages logged by a thread outside of iteration go to setup log. An error ends current
+    iteration, unless the thread keeps it until the iteration function returns.
+    """
+
     def __init__(self, begin_message=None, log_config=None):
         super().__init__(begin_message)
         self._config = HtmlLogConfig() if log_config is None else log_config
         self._main = None
         self._log_setup = None
         self._log_iterations = []
-        self._current_log = None
+        self._open_iterations = []
         self._files_path = None
+        self._event_log = None
+        self._checkpointer = None
+        self._metrics = {}
+        self._lock = RLock()
+        self._local = local()
+
+    @property
+    def _current_iteration(self):
+        return getattr(self._local, 'iteration', None)
+
+    @property
+    def _current_log(self):
+        iteration = self._current_iteration
+        return iteration if iteration is not None else self._log_setup
+
+    def __add(self, event, *args):
+        if self._event_log is not None:
+            getattr(self._event_log, event)(*args)
 
-    def __add(self, msg):
-        pass
+    def __changed(self, *logs):
+        if self._checkpointer is not None:
+            self._checkpointer.mark_dirty(*logs)
 
     def begin(self, message):
+        message = escape(message)
         self._files_path = self._config.create_html_test_log(message)
+        if self._config.event_log:
+            self._event_log = EventLog(self._files_path)
         self._main = HtmlMainLog(message, self._config)
         self._log_setup = HtmlSetupLog(message, config=self._config)
-        self._current_log = self._log_setup
         self._main.begin(message)
         self._current_log.begin(message)
-        self.__add("begin: " + message)
+        self.__add("begin", message)
+        if self._config.checkpoint_interval is not None or \
+                self._config.checkpoint_steps is not None:
+            self._checkpointer = HtmlLogCheckpointer(
+                self._lock, self._config.checkpoint_interval, self._config.checkpoint_steps)
+            self.__changed(self._main, self._log_setup)
 
     @property
     def base_dir(self):
         return self._files_path
 
     def get_result(self):
-        log_result = self._log_setup.get_result()
-        for iteration in self._log_iterations:
-            if log_result.value < iteration.get_result().value:
-                log_result = iteration.get_result()
-        return log_result
+        with self._lock:
+            log_result = self._log_setup.get_result()
+            for iteration in self._log_iterations + self._open_iterations:
+                if log_result.value < iteration.get_result().value:
+                    log_result = iteration.get_result()
+            return log_result
+
+    def add_metrics(self, name, metrics):
+        """Registers metrics (e.g. ExecutorMetrics) to dump and summarize at the end of test."""
+        self._metrics[name] = metrics
+
+    def checkpoint(self):
+        """Writes log pages changed since the last checkpoint."""
+        if self._checkpointer is not None:
+            self._checkpointer.checkpoint()
 
     def end(self):
-        self._log_setup.end()
-        self._main.end_setup_iteration(self._log_setup.get_result())
-        log_result = self.get_result()
-        self._main.end(log_result)
-        self.__add("end")
+        if self._checkpointer is not None:
+            self._checkpointer.stop()
+        with self._lock:
+            self._log_setup.end()
+            self._main.end_setup_iteration(self._log_setup.get_result())
+            log_result = self.get_result()
+            for name, metrics in self._metrics.items():
+                metrics.dump(os.path.join(self._files_path, "dut_info", f"{name}_metrics.json"))
+                self._main.add_metrics_summary(name, metrics.SUMMARY_HEADER, metrics.summary())
+            self._main.end(log_result)
+            self.__add("end", log_result)
 
     def add_build_info(self, message):
-        self._main.add_build_info(escape(message))
+        with self._lock:
+            self._main.add_build_info(escape(message))
+            self.__changed(self._main)
 
     def start_iteration(self, message):
         message = escape(message)
-        self._log_iterations.append(HtmlIterationLog(message, message, self._config))
-        self._main.start_iteration(self._config.get_iteration_id())
-        self._current_log = self._log_iterations[-1]
-        self._current_log.begin(message)
-        self._log_setup.start_iteration(message)
-        self.__add("start_iteration: " + message)
+        with self._lock:
+            iteration = HtmlIterationLog(message, message, self._config)
+            self._open_iterations.append(iteration)
+            self._local.iteration = iteration
+            iteration.begin(message)
+            self._log_setup.start_iteration(message)
+            self.__add("start_iteration", message)
+            self.__changed(iteration, self._log_setup)
 
     def end_iteration(self):
-        self._current_log.end()
-        self._main.end_iteration(self._current_log.get_result())
-        self._log_setup.end_iteration(self._current_log.get_result())
-        self._current_log.iteration_closed = True
-        self._current_log = self._log_setup
-        self.__add("end_iteration: ")
-        return self._current_log
-
-    def debug(self, message):
-        self._current_log.debug(escape(message))
-        self.__add("debug: " + message)
+        with self._lock:
+            iteration = self._current_iteration
+            if iteration is None:
+                # already ended, e.g. by error ending all groups
+                return self._current_log
+            if self._checkpointer is not None:
+                self._checkpointer.forget(iteration)
+            iteration.end()
+            # only summary of finished iteration is kept, its page is already written
+            summary = iteration.summary()
+            self._open_iterations.remove(iteration)
+            self._log_iterations.append(summary)
+            self._main.end_iteration(summary)
+            self._log_setup.end_iteration(summary.result, summary.title)
+            self.__add("end_iteration", summary.result)
+            self.__changed(self._log_setup)
+            self._local.iteration = None
+            return self._current_log
+
+    def debug(self, message, event: bool = True):
+        # 'event' is False for messages already recorded in event log in another form,
+        # e.g. command log messages recorded as command and output events
+        html_message = self._config.log_filter.to_html(BaseLogResult.DEBUG, message)
+        if html_message is not None:
+            html_message = escape(html_message)
+        with self._lock:
+            if html_message is not None:
+                self._current_log.debug(html_message)
+            if event:
+                self.__add("step", "debug", message)
+            self.__changed(self._current_log)
 
     def info(self, message):
-        self._current_log.info(escape(message))
-        self.__add("info: " + message)
+        html_message = self._config.log_filter.to_html(BaseLogResult.PASSED, message)
+        if html_message is not None:
+            html_message = escape(html_message)
+        with self._lock:
+            if html_message is not None:
+                self._current_log.info(html_message)
+            self.__add("step", "info", message)
+            self.__changed(self._current_log)
 
     def workaround(self, message):
-        self._current_log.workaround(escape(message))
-        self.__add(": " + message)
+        message = escape(message)
+        with self._lock:
+            self._current_log.workaround(message)
+            self.__add("step", "workaround", message)
+            self.__changed(self._current_log)
 
     def warning(self, message):
-        self._current_log.warning(escape(message))
-        self.__add(": " + message)
+        message = escape(message)
+        with self._lock:
+            self._current_log.warning(message)
+            self.__add("step", "warning", message)
+            self.__changed(self._current_log)
 
     def skip(self, message):
-        self._current_log.skip(escape(message))
-        self.__add("warning: " + message)
+        message = escape(message)
+        with self._lock:
+            self._current_log.skip(message)
+            self.__add("step", "skip", message)
+            self.__changed(self._current_log)
 
     def error(self, message):
-        self._current_log.error(escape(message))
-        self.__add("error: " + message)
-        self.end_all_groups()
+        message = escape(message)
+        with self._lock:
+            self._current_log.error(message)
+            self.__add("step", "error", message)
+            self.__changed(self._current_log)
+            self.end_all_groups()
 
     def blocked(self, message):
-        self._current_log.blocked(escape(message))
-        self.__add(f'blocked: {message}')
-        self.end_all_groups()
+        message = escape(message)
+        with self._lock:
+            self._current_log.blocked(message)
+            self.__add("step", "blocked", message)
+            self.__changed(self._current_log)
+            self.end_all_groups()
 
     def exception(self, message):
-        self._current_log.exception(escape(message))
-        self.__add("exception: " + message)
-        self.end_all_groups()
+        message = escape(message)
+        with self._lock:
+            self._current_log.exception(message)
+            self.__add("step", "exception", message)
+            self.__changed(self._current_log)
+            self.end_all_groups()
 
     def critical(self, message):
-        self._current_log.critical(escape(message))
-        self.__add("critical: " + message)
-        self.end_all_groups()
+        message = escape(message)
+        with self._lock:
+            self._current_log.critical(message)
+            self.__add("step", "critical", message)
+            self.__changed(self._current_log)
+            self.end_all_groups()
+
+    def add_step_stats(self, **values):
+        """Adds executor time, command count, transferred bytes or sleep time to open steps."""
+        with self._lock:
+            self._current_log.add_step_stats(**values)
+            self.__changed(self._current_log)
 
     def start_group(self, message):
-        self._current_log.start_group(escape(message))
-        self.__add("start_group: " + message)
+        message = escape(message)
+        with self._lock:
+            self._current_log.start_group(message)
+            self.__add("start_group", message)
+            self.__changed(self._current_log)
 
     def end_group(self):
-        self._current_log.end_group()
-        self.__add("end_group")
+        with self._lock:
+            self._current_log.end_group()
+            self.__add("end_group")
+            self.__changed(self._current_log)
 
     def end_all_groups(self):
-        for iteration in reversed(self._log_iterations):
-            if not iteration.iteration_closed:
+        with self._lock:
+            if self._current_iteration is not None \
+                    and not getattr(self._local, 'keep_iteration', False):
                 self.end_iteration()
-        self._current_log.end_all_groups()
+            self._current_log.end_all_groups()
+            self.__add("end_all_groups")
+            self.__changed(self._current_log)
@@ -9,45 +9,50 @@ from lxml.etree import Element
 
 class HtmlMainLog(HtmlFileLog):
     def __init__(self, title, config):
-        super().__init__(config.get_main_file_path(), title)
+        super().__init__(config.get_main_file_path(), title, config.streaming)
         self._config = config
-        self.__current_iteration_id = None
-        root = self.get_root()
-        test_title_div = root.xpath('/html/body/div/div/div/div[@class="sidebar-test-title"]')[0]
+        test_title_div = self.get_nodes(
+            '/html/body/div/div/div/div[@class="sidebar-test-title"]')[0]
         test_title_div.text = title
-        self.__build_information_set = root.xpath(
+        self.__build_information_set = self.get_nodes(
             '/html/body/div/div/div/div[@id="sidebar-tested-build"]')[0]
+        self.__metrics_set = self.get_nodes(
+            '/html/body/div/div/div[@id="sidebar-metrics"]')[0]
 
     def add_build_info(self, message):
         build_info = Element("div")
         build_info.text = message
         self.__build_information_set.append(build_info)
 
-    def start_iteration(self, iteration_id):
-        self.__current_iteration_id = iteration_id
-
-    def end_iteration(self):
-        pass
-
-    def end_iteration(self, iteration_result):
-        root = self.get_root()
-        iteration_selector_div = root.xpath('/html/body/div/div/div[@id="iteration-selector"]')
-        iteration_selector_select = root.xpath(
-            '/html/body/div/div/select[@id="sidebar-iteration-list"]')[0]
-        self._config.end_iteration(iteration_selector_div,
-                                   iteration_selector_select,
-                                   self.__current_iteration_id,
-                                   iteration_result)
+    def add_metrics_summary(self, title, header, rows):
+        table = Element("table")
+        caption = Element("caption")
+        caption.text = f"{title.capitalize()} metrics:"
+        table.append(caption)
+        for row, cell_tag in [(header, "th")] + [(row, "td") for row in rows]:
+            table_row = Element("tr")
+            for value in row:
+                cell = Element(cell_tag)
+                cell.text = value
+                table_row.append(cell)
+            table.append(table_row)
+        self.__metrics_set.append(table)
+
+    def end_iteration(self, iteration_summary):
+        # iteration selectors are built page by page by main.js from records file,
+        # so main page does not grow with number of iterations
+        with open(self._config.get_iterations_file_path(), "a") as iterations_file:
+            self._config.end_iteration(iterations_file, iteration_summary)
 
     def end_setup_iteration(self, result):
-        root = self.get_root()
-        iteration_selector_div = root.xpath('/html/body/div/div/div[@id="iteration-selector"]')[0]
-        iteration_selector_select = root.xpath(
+        iteration_selector_div = self.get_nodes(
+            '/html/body/div/div/div[@id="iteration-selector"]')[0]
+        iteration_selector_select = self.get_nodes(
             '/html/body/div/div/select[@id="sidebar-iteration-list"]')[0]
         self._config.end_setup_iteration(iteration_selector_div, iteration_selector_select, result)
 
     def end(self, result):
-        root = self.get_root()
-        test_status_div = root.xpath('/html/body/div/div/div/div[@class="sidebar-test-status"]')
+        test_status_div = self.get_nodes(
+            '/html/body/div/div/div/div[@class="sidebar-test-status"]')
         self._config.end_main_log(test_status_div, result)
         super().end()
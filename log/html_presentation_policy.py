@@ -3,7 +3,7 @@
 # SPDX-License-Identifier: BSD-3-Clause-Clear
 #
 
-from log.base_log import BaseLogResult
+from log.base_log import BaseLogResult, LinkedMessage
 from lxml.etree import Element
 from datetime import datetime
 from log.presentation_policy import PresentationPolicy
@@ -27,6 +27,10 @@ def std_log_entry(msg_id, msg, log_result, html_node):
     test_msg = Element('div')
     test_msg.set('class', 'ts-msg')
     test_msg.text = msg
+    if isinstance(msg, LinkedMessage):
+        link = Element('a', href=msg.link, target='_blank')
+        link.text = f"[{msg.link_text}]"
+        test_msg.append(link)
     test_step.append(test_msg)
     html_node.append(test_step)
 
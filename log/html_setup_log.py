@@ -31,8 +31,11 @@ class HtmlSetupLog(HtmlFileItemLog):
         self._last_iteration_title = message
         self._iteration_idx += 1
 
-    def end_iteration(self, iteration_result):
-        HtmlSetupLog.LOG_RESULT[iteration_result](self, self._last_iteration_title)
+    def end_iteration(self, iteration_result, iteration_title=None):
+        # title is given when iterations run in parallel and do not end in order of start
+        if iteration_title is None:
+            iteration_title = self._last_iteration_title
+        HtmlSetupLog.LOG_RESULT[iteration_result](self, iteration_title)
 
     def end(self):
         if self._iteration_idx > 0:
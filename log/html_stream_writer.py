@@ -0,0 +1,116 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+from datetime import timedelta
+from itertools import count
+from json.encoder import encode_basestring_ascii
+from threading import Lock
+from time import monotonic
+
+from lxml.etree import Element, tostring
+
+from log.presentation_policy import PresentationPolicy
+
+
+class HtmlStreamWriter:
+    """
+    Writes changes of an html log page as records appended to a script file loaded by
+    the page ('logRecord([operation, node id, values...]);' lines replayed by main.js).
+    Appended elements are serialized and dropped, so memory usage does not grow with
+    the number of log steps.
+    """
+    FLUSH_INTERVAL = timedelta(seconds=1)
+
+    def __init__(self, html_file_path):
+        self.path = f"{html_file_path[:-len('.html')]}_records.js"
+        self._file = open(self.path, "a")
+        self._lock = Lock()
+        self._ids = count(1)
+        self._last_flush = monotonic()
+
+    def new_id(self):
+        return f"n{next(self._ids)}"
+
+    def node(self, element):
+        return StreamNode(self, element)
+
+    def record(self, *fields):
+        line = f"logRecord([{','.join(map(encode_basestring_ascii, fields))}]);\n"
+        with self._lock:
+            self._file.write(line)
+            if monotonic() - self._last_flush > self.FLUSH_INTERVAL.total_seconds():
+                self.__flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self.__flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __flush(self):
+        self._file.flush()
+        self._last_flush = monotonic()
+
+
+class StreamNode:
+    """
+    Stands in for an lxml element of a streamed html log page. Changes are written as
+    records instead of being applied to the element, appended elements are not kept.
+    """
+
+    def __init__(self, writer: HtmlStreamWriter, element):
+        self.writer = writer
+        self._element = element
+        self.sid = element.get('data-sid')
+        if self.sid is None:
+            self.sid = writer.new_id()
+            element.set('data-sid', self.sid)
+
+    def append(self, element):
+        element.set('data-sid', self.writer.new_id())
+        self.writer.record('append', self.sid,
+                           tostring(element, encoding='unicode', method='html'))
+
+    def set(self, key, value):
+        self._element.set(key, value)
+        self.writer.record('set', self.sid, key, value)
+
+    def get(self, key, default=None):
+        return self._element.get(key, default)
+
+    @property
+    def text(self):
+        return self._element.text
+
+    @text.setter
+    def text(self, value):
+        self._element.text = value
+        self.writer.record('text', self.sid, value)
+
+    def __getitem__(self, index):
+        return StreamNode(self.writer, self._element[index])
+
+
+def stream_policy(policy: PresentationPolicy):
+    """Adapts presentation policy building lxml elements to StreamNode containers."""
+
+    def standard(msg_id, msg, log_result, stream_node):
+        element = Element('div')
+        policy.standard(msg_id, msg, log_result, element)
+        for child in element:
+            stream_node.append(child)
+
+    def group_begin(msg_id, msg, stream_node):
+        element = Element('div')
+        header, container = policy.group_begin(msg_id, msg, element)
+        for child in element:
+            stream_node.append(child)
+        return StreamNode(stream_node.writer, header), StreamNode(stream_node.writer, container)
+
+    return PresentationPolicy(standard, group_begin)
@@ -0,0 +1,100 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import re
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+from time import monotonic
+
+from log.base_log import BaseLogResult, LinkedMessage
+
+
+class LogFilter:
+    """
+    Decides which debug and info messages are written to html log and to console.
+    Messages below the level of a sink are not written to it. Repeated debug messages
+    (same text with numbers ignored) are sampled in html log: after 'repeat_limit' of them
+    within 'repeat_window' only every 'sample_rate'-th one is written, with the number of
+    dropped ones. Command outputs longer than 'max_output_size' are truncated in html log.
+    Messages which change the result (warnings, errors...) are never filtered. Command log
+    and event log always get all messages.
+    """
+    DEFAULT_REPEAT_LIMIT = 50
+    DEFAULT_REPEAT_WINDOW = timedelta(minutes=1)
+    DEFAULT_SAMPLE_RATE = 100
+    DEFAULT_MAX_OUTPUT_SIZE = 16 * 1024
+    REPEAT_KEY_LENGTH = 200
+    MAX_TRACKED_MESSAGES = 1024
+
+    def __init__(self,
+                 html_level: BaseLogResult = BaseLogResult.DEBUG,
+                 console_level: BaseLogResult = BaseLogResult.DEBUG,
+                 repeat_limit: int = DEFAULT_REPEAT_LIMIT,
+                 repeat_window: timedelta = DEFAULT_REPEAT_WINDOW,
+                 sample_rate: int = DEFAULT_SAMPLE_RATE,
+                 max_output_size: int = DEFAULT_MAX_OUTPUT_SIZE):
+        self.html_level = html_level
+        self.console_level = console_level
+        # None disables sampling of repeated messages
+        self.repeat_limit = repeat_limit
+        self.repeat_window = repeat_window
+        self.sample_rate = sample_rate
+        # None disables truncating of command outputs
+        self.max_output_size = max_output_size
+        self.dropped = 0
+        self.truncated = 0
+        self._repeats = OrderedDict()
+        self._lock = Lock()
+
+    def to_console(self, level: BaseLogResult):
+        return level.value >= self.console_level.value
+
+    def to_html(self, level: BaseLogResult, message):
+        """Returns message to write to html log or None if it is filtered out."""
+        if level.value < self.html_level.value:
+            return None
+        if level != BaseLogResult.DEBUG or self.repeat_limit is None:
+            return message
+        return self.__sample(message)
+
+    def is_output_too_long(self, output):
+        return self.max_output_size is not None and \
+            len(output.stdout or '') + len(output.stderr or '') > self.max_output_size
+
+    def truncate_output(self, output):
+        """Returns stdout and stderr of output shortened to fit in 'max_output_size'."""
+        self.truncated += 1
+        size = self.max_output_size // 2
+        return tuple(text if text is None or len(text) <= size
+                     else f"{text[:size]}\n[... {len(text)} characters in total]"
+                     for text in (output.stdout, output.stderr))
+
+    def __sample(self, message):
+        key = re.sub(r'\d+', '#', message[:self.REPEAT_KEY_LENGTH])
+        now = monotonic()
+        with self._lock:
+            entry = self._repeats.get(key)
+            if entry is None or now - entry[1] > self.repeat_window.total_seconds():
+                # [occurrences, window start, dropped since last written]
+                entry = self._repeats[key] = [0, now, 0]
+                while len(self._repeats) > self.MAX_TRACKED_MESSAGES:
+                    self._repeats.popitem(last=False)
+            self._repeats.move_to_end(key)
+            entry[0] += 1
+            if entry[0] > self.repeat_limit and \
+                    (entry[0] - self.repeat_limit) % self.sample_rate != 0:
+                entry[2] += 1
+                self.dropped += 1
+                return None
+            dropped, entry[2] = entry[2], 0
+        if not dropped:
+            return message
+        text = f"{message}\n[{dropped} similar messages not shown]"
+        return message.with_text(text) if isinstance(message, LinkedMessage) else text
+
+    def __str__(self):
+        return f"Log filter: {self.dropped} repeated messages and {self.truncated} " \
+            f"command outputs not written to html log"
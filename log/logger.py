@@ -4,23 +4,34 @@
 #
 
 from contextlib import contextmanager
+import cProfile
+import io
 import logging
+import pstats
 import sys
 import os
+import threading
+import traceback
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 from threading import Lock
 from datetime import datetime
+from log.base_log import BaseLogResult, LinkedMessage
+from log.command_log_writer import CommandLogWriter
 from log.html_log_manager import HtmlLogManager
 from log.html_log_config import HtmlLogConfig
 from log.html_presentation_policy import html_policy
 from test_utils.output import Output
 from test_utils.singleton import Singleton
-from test_utils.file_locker import lock_file
 
 
-def create_log(log_base_path, test_module, additional_args=None):
+def create_log(log_base_path, test_module, additional_args=None, streaming=False,
+               log_filter=None):
     Log.setup()
     log_cfg = HtmlLogConfig(base_dir=log_base_path,
-                            presentation_policy=html_policy)
+                            presentation_policy=html_policy,
+                            streaming=streaming,
+                            log_filter=log_filter)
     log = Log(log_config=log_cfg)
     test_name = 'TestNameError'
     error_msg = None
@@ -44,10 +55,16 @@ class Log(HtmlLogManager, metaclass=Singleton):
     DATE_FORMAT = "%Y/%m/%d %H:%M:%S"
     command_id = 0
     lock = Lock()
+    # write command log synchronously, useful when debugging crashes
+    synchronous_command_log = False
+    command_log = None
+    profile_id = 0
 
     @classmethod
     def destroy(cls):
-        del cls._instances[cls]
+        instance = cls._instances.pop(cls)
+        if instance.command_log is not None:
+            instance.command_log.close()
 
     @classmethod
     def setup(cls):
@@ -76,14 +93,57 @@ class Log(HtmlLogManager, metaclass=Singleton):
         logger.info("Logger successfully initialized.")
 
     @contextmanager
-    def step(self, message):
+    def step(self, message, profile: bool = False, trace_memory: bool = False):
         self.step_info(message)
         super(Log, self).start_group(message)
         if Log.logger:
             Log.logger.info(message)
-        yield
+        if profile or trace_memory:
+            with self.__profile(message, profile, trace_memory):
+                yield
+        else:
+            yield
         super(Log, self).end_group()
 
+    @contextmanager
+    def __profile(self, step_name, profile, trace_memory):
+        # report is saved in log directory and linked from the step
+        profiler = cProfile.Profile() if profile else None
+        start_tracing = trace_memory and not tracemalloc.is_tracing()
+        if start_tracing:
+            tracemalloc.start()
+        snapshot = tracemalloc.take_snapshot() if trace_memory else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            report = io.StringIO()
+            if profiler is not None:
+                profiler.disable()
+                pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(50)
+            if trace_memory:
+                not_tracemalloc = tracemalloc.Filter(False, tracemalloc.__file__)
+                differences = tracemalloc.take_snapshot().filter_traces([not_tracemalloc]) \
+                    .compare_to(snapshot.filter_traces([not_tracemalloc]), "lineno")
+                if start_tracing:
+                    tracemalloc.stop()
+                report.write("Memory allocated during step (top 30 lines):\n")
+                for difference in differences[:30]:
+                    report.write(f"{difference}\n")
+            self.__save_profile(step_name, report.getvalue())
+
+    def __save_profile(self, step_name, report):
+        with self.lock:
+            self.profile_id += 1
+            file_name = f"step_{self.profile_id}.txt"
+        profile_dir = os.path.join(self.base_dir, "profiles")
+        os.makedirs(profile_dir, exist_ok=True)
+        with open(os.path.join(profile_dir, file_name), "w") as profile_file:
+            profile_file.write(f"{step_name}\n\n{report}")
+        self.info(LinkedMessage(f"Profile of step '{step_name}'",
+                                f"../profiles/{file_name}", "profile"))
+
     def add_build_info(self, msg):
         super(Log, self).add_build_info(msg)
         if Log.logger:
@@ -91,33 +151,37 @@ class Log(HtmlLogManager, metaclass=Singleton):
 
     def info(self, msg):
         super(Log, self).info(msg)
-        if Log.logger:
+        if Log.logger and self._config.log_filter.to_console(BaseLogResult.PASSED):
             Log.logger.info(msg)
 
     def debug(self, msg):
         super(Log, self).debug(msg)
-        if Log.logger:
+        if Log.logger and self._config.log_filter.to_console(BaseLogResult.DEBUG):
             Log.logger.debug(msg)
 
     def error(self, msg):
         super(Log, self).error(msg)
         if Log.logger:
             Log.logger.error(msg)
+        self.flush_command_log()
 
     def blocked(self, msg):
         super(Log, self).blocked(msg)
         if Log.logger:
             Log.logger.fatal(msg)
+        self.flush_command_log()
 
     def exception(self, msg):
         super(Log, self).exception(msg)
         if Log.logger:
             Log.logger.exception(msg)
+        self.flush_command_log()
 
     def critical(self, msg):
         super(Log, self).critical(msg)
         if Log.logger:
             Log.logger.fatal(msg)
+        self.flush_command_log()
 
     def workaround(self, msg):
         super(Log, self).workaround(msg)
@@ -136,27 +200,118 @@ class Log(HtmlLogManager, metaclass=Singleton):
         self.lock.release()
         return command_id
 
-    def write_to_command_log(self, message):
-        super(Log, self).debug(message)
-        command_log_path = os.path.join(self.base_dir, "dut_info", 'commands.log')
+    def start_iteration(self, message):
+        super(Log, self).start_iteration(message)
+        if threading.current_thread() is not threading.main_thread():
+            # commands of iterations run in parallel are not interleaved in command log,
+            # they are written to a segment merged into command log at iteration end
+            segment_path = os.path.join(
+                self.base_dir, "dut_info",
+                f"commands_iteration_{str(self._current_iteration.iteration_id).zfill(3)}.log")
+            self._local.command_log = CommandLogWriter(segment_path, self.synchronous_command_log)
+
+    def end_iteration(self):
+        segment = getattr(self._local, 'command_log', None)
+        result = super(Log, self).end_iteration()
+        if segment is not None:
+            self._local.command_log = None
+            segment.close()
+            # segment file is created by the first command of iteration
+            if os.path.exists(segment.path):
+                with open(segment.path) as segment_file:
+                    self.__get_command_log().write(segment_file.read())
+                os.remove(segment.path)
+        return result
+
+    def run_parallel_iterations(self, iterations: dict, max_workers: int = None):
+        """
+        Runs iterations in parallel threads, e.g. the same test on different disks of DUT.
+        'iterations' maps iteration title to a function run as the iteration. Exception raised
+        by a function is logged in its iteration. Returns dict of functions results.
+        """
+        def run_iteration(title, function):
+            # iteration (with its command log segment) stays current in the thread after
+            # an error, so cleanup done by the function does not go to setup log
+            self._local.keep_iteration = True
+            self.start_iteration(title)
+            try:
+                return function()
+            except Exception as e:
+                self.exception(f"Exception in iteration '{title}': {e}\n{traceback.format_exc()}")
+            finally:
+                self.end_iteration()
+                self._local.keep_iteration = False
+
+        with ThreadPoolExecutor(max_workers) as pool:
+            futures = {title: pool.submit(run_iteration, title, function)
+                       for title, function in iterations.items()}
+        return {title: future.result() for title, future in futures.items()}
+
+    def end(self):
+        from core.test_run import TestRun
+        if TestRun.executor is not None:
+            self.add_metrics("executor", TestRun.executor.metrics)
+        super(Log, self).end()
+        self.flush_command_log()
+
+    def flush_command_log(self):
+        for command_log in (self.command_log, getattr(self._local, 'command_log', None)):
+            if command_log is not None:
+                command_log.flush()
+        if self._event_log is not None:
+            self._event_log.flush()
+
+    def write_to_command_log(self, message, html_message=None):
+        super(Log, self).debug(message if html_message is None else html_message, event=False)
+        self.write_to_command_log_file(message)
+
+    def write_to_command_log_file(self, message):
+        # command log only, without a step in html log
+        command_log = getattr(self._local, 'command_log', None) or self.__get_command_log()
         timestamp = datetime.now().strftime('%Y-%m-%d_%H:%M:%S:%f')
-        with open(command_log_path, "ab+") as command_log:
-            with lock_file(command_log):
-                line_to_write = f"[{timestamp}] {message}\n"
-                command_log.write(line_to_write.encode())
+        command_log.write(f"[{timestamp}] {message}\n")
+
+    def __get_command_log(self):
+        if self.command_log is None:
+            with self.lock:
+                if self.command_log is None:
+                    self.command_log = CommandLogWriter(
+                        os.path.join(self.base_dir, "dut_info", 'commands.log'),
+                        self.synchronous_command_log)
+        return self.command_log
 
     def write_command_to_command_log(self, command, command_id):
         self.write_to_command_log(f"Command id: {command_id}\n{command}")
+        if self._event_log is not None:
+            self._event_log.command(command_id, command)
 
     def write_output_to_command_log(self, output: Output, command_id):
+        if self._event_log is not None:
+            self._event_log.output(command_id, output)
         if output is not None:
             line_to_write = f"Command id: {command_id}\n\texit code: {output.exit_code}\n" \
                 f"\tstdout: {output.stdout}\n" \
                 f"\tstderr: {output.stderr}\n\n\n"
-            self.write_to_command_log(line_to_write)
+            html_message = None
+            if self._config.log_filter.is_output_too_long(output):
+                html_message = self.__save_full_output(line_to_write, output, command_id)
+            self.write_to_command_log(line_to_write, html_message)
         else:
             self.write_to_command_log(f"Command id: {command_id}\n\tNone output.")
 
+    def __save_full_output(self, line_to_write, output, command_id):
+        # html log gets only beginning of long output with a link to file with whole output
+        output_dir = os.path.join(self.base_dir, "dut_info", "outputs")
+        os.makedirs(output_dir, exist_ok=True)
+        file_name = f"command_{command_id}.log"
+        with open(os.path.join(output_dir, file_name), "w") as output_file:
+            output_file.write(line_to_write)
+        stdout, stderr = self._config.log_filter.truncate_output(output)
+        return LinkedMessage(f"Command id: {command_id}\n\texit code: {output.exit_code}\n"
+                             f"\tstdout: {stdout}\n"
+                             f"\tstderr: {stderr}\n",
+                             f"../dut_info/outputs/{file_name}", "full output")
+
     def step_info(self, step_name):
         from core.test_run import TestRun
         decorator = "// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //\n\n"
@@ -169,22 +324,18 @@ class Log(HtmlLogManager, metaclass=Singleton):
 
     def get_additional_logs(self):
         from core.test_run import TestRun
-        from connection.ssh_executor import SshExecutor
-        from connection.local_executor import LocalExecutor
         log_files = {"messages": "/var/log/messages",
                      "dmesg": "/home/user/dmesg",
                      "cas": "/var/log/opencas.log"}
         TestRun.executor.run(f"dmesg > {log_files['dmesg']}")
+        if TestRun.executor.cache is not None:
+            TestRun.LOGGER.debug(str(TestRun.executor.cache))
+        TestRun.LOGGER.debug(str(self._config.log_filter))
 
         for key in log_files.keys():
             try:
                 log_destination_path = os.path.join(self.base_dir, "dut_info", f'{key}.log')
-                if type(TestRun.executor) is SshExecutor:
-                    sftp = TestRun.executor.ssh.open_sftp()
-                    sftp.get(log_files[key], log_destination_path)
-                    sftp.close()
-                elif type(TestRun.executor) is LocalExecutor:
-                    TestRun.executor.run(f"cp {log_files[key]} {log_destination_path}")
+                TestRun.executor.rsync_from(log_files[key], log_destination_path)
             except Exception as e:
                 TestRun.LOGGER.warning(f"There was a problem during gathering {key} log.\n"
                                        f"{str(e)}")
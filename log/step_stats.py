@@ -0,0 +1,61 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import time
+
+
+class StepStats:
+    """
+    Where the time of a test step goes: executor (commands and file transfers on DUT),
+    sleeping while waiting for DUT and the rest, which is spent locally in Python.
+    """
+
+    def __init__(self):
+        self._start_time = time.monotonic()
+        self._end_time = None
+        self.executor_time = 0.0
+        self.commands = 0
+        self.transferred_bytes = 0
+        self.sleep_time = 0.0
+
+    def add(self, executor_time=0.0, commands=0, transferred_bytes=0, sleep_time=0.0):
+        self.executor_time += executor_time
+        self.commands += commands
+        self.transferred_bytes += transferred_bytes
+        self.sleep_time += sleep_time
+
+    def end(self):
+        self._end_time = time.monotonic()
+
+    @property
+    def total_time(self):
+        end_time = self._end_time if self._end_time is not None else time.monotonic()
+        return end_time - self._start_time
+
+    @property
+    def local_time(self):
+        return max(0.0, self.total_time - self.executor_time - self.sleep_time)
+
+    def __str__(self):
+        return f"executor {self.executor_time:.2f} s ({self.commands} commands, " \
+            f"{format_bytes(self.transferred_bytes)}), sleep {self.sleep_time:.2f} s, " \
+            f"local {self.local_time:.2f} s"
+
+
+def format_bytes(count):
+    for unit in ("B", "KiB", "MiB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GiB"
+
+
+def sleep(seconds):
+    """time.sleep() counted as sleep time of the currently open test steps."""
+    from core.test_run import TestRun
+    start_time = time.monotonic()
+    time.sleep(seconds)
+    if TestRun.LOGGER is not None:
+        TestRun.LOGGER.add_step_stats(sleep_time=time.monotonic() - start_time)
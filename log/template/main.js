@@ -62,7 +62,9 @@ function showSidebar(mContainer, sidebar, ctrlHide, ctrlShowSet, sidebarTest) {
     }
     document.getElementById('iteration-selector').style.display = '';
     document.getElementById('sidebar-iteration-list').style.display = '';
+    showIterationPage(iterationPage);
     document.getElementById('sidebar-copyright').style.display = '';
+    document.getElementById('sidebar-metrics').style.display = '';
     for(i = 0; i < ctrlShowSet.length; i ++) {
         ctrlShowSet[i].style.display = 'none';
     }
@@ -71,7 +73,9 @@ function showSidebar(mContainer, sidebar, ctrlHide, ctrlShowSet, sidebarTest) {
 function hideSidebar(mContainer, sidebar, ctrlHide, ctrlShowSet, sidebarTest) {
     document.getElementById('iteration-selector').style.display = 'none';
     document.getElementById('sidebar-iteration-list').style.display = 'none';
+    document.getElementById('iteration-pages').style.display = 'none';
     document.getElementById('sidebar-copyright').style.display = 'none';
+    document.getElementById('sidebar-metrics').style.display = 'none';
     var i;
     for (i = 0; i < sidebarTest.children.length; i++) { 
         sidebarTest.children[i].style.display = 'none';
@@ -156,10 +160,78 @@ function clickSelectIteration() {
 function selectIteration(iteration) {
     var selectElement = document.getElementById("sidebar-iteration-list");
     var docId = loadDocument(iteration);
-    selectElement.selectedIndex = docId;
+    if (docId > 0) {
+        var index = iterations.findIndex(function(record) { return record[0] == docId; });
+        if (index >= 0) {
+            showIterationPage(Math.floor(index / ITERATIONS_PER_PAGE));
+        }
+    }
+    selectElement.value = iteration;
     updateIterationSelector(selectElement);
 }
 
+var ITERATIONS_PER_PAGE = 64;
+var iterations = [];
+var iterationPage = 0;
+
+function logIteration(record) {
+    // record: [iteration id, iteration title, result style, execution time]
+    iterations.push(record);
+}
+
+function showIterationPage(page) {
+    var pageElement = document.getElementById('iteration-page');
+    if (pageElement == null) {
+        return;
+    }
+    var pageCount = Math.max(1, Math.ceil(iterations.length / ITERATIONS_PER_PAGE));
+    iterationPage = Math.min(Math.max(page, 0), pageCount - 1);
+    var selectElement = document.getElementById('sidebar-iteration-list');
+    var selected = selectElement.value;
+    while (pageElement.firstChild != null) {
+        pageElement.removeChild(pageElement.firstChild);
+    }
+    while (selectElement.length > 1) {
+        selectElement.remove(1);
+    }
+    var first = iterationPage * ITERATIONS_PER_PAGE;
+    var last = Math.min(first + ITERATIONS_PER_PAGE, iterations.length);
+    for (var i = first; i < last; i ++) {
+        var id = iterations[i][0];
+        var description = iterations[i][1] + ' (' + iterations[i][3] + ')';
+        if ((i - first) % 8 == 7) {
+            pageElement.appendChild(document.createElement('br'));
+        }
+        var link = document.createElement('a');
+        link.className = 'iteration-selector ' + iterations[i][2];
+        link.setAttribute('onclick', "selectIteration('" + id + "')");
+        link.title = description;
+        link.textContent = id;
+        pageElement.appendChild(link);
+        var option = document.createElement('option');
+        option.value = id;
+        option.title = description;
+        option.textContent = 'iteration_' + pad(String(id), 3);
+        if (iterations[i][2] != '') {
+            option.className = iterations[i][2];
+        }
+        selectElement.appendChild(option);
+    }
+    selectElement.value = selected;
+    if (selectElement.selectedIndex < 0) {
+        selectElement.selectedIndex = 0;
+    }
+    document.getElementById('iteration-page-label').textContent =
+        (iterationPage + 1) + ' / ' + pageCount;
+    document.getElementById('iteration-pages').style.display = pageCount > 1 ? '' : 'none';
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    // iterations run in parallel are written in order of their end
+    iterations.sort(function(a, b) { return a[0] - b[0]; });
+    showIterationPage(0);
+});
+
 function loadDocument(fileId) {
     var result = 0;
     if(fileId == 'M') {
@@ -221,3 +293,38 @@ function chapterClick(id) {
         destinationElement.style.display = 'none';
     }
 }
+
+var logNodes = null;
+
+function logRecord(record) {
+    if (logNodes == null) {
+        logNodes = {};
+        var elements = document.querySelectorAll('[data-sid]');
+        for (var i = 0; i < elements.length; i ++) {
+            logNodes[elements[i].getAttribute('data-sid')] = elements[i];
+        }
+    }
+    var node = logNodes[record[1]];
+    if (node == null) {
+        return;
+    }
+    switch(record[0]) {
+        case 'append':
+            var template = document.createElement('template');
+            template.innerHTML = record[2];
+            var element = template.content.firstElementChild;
+            node.appendChild(element);
+            logNodes[element.getAttribute('data-sid')] = element;
+            break;
+        case 'set':
+            node.setAttribute(record[2], record[3]);
+            break;
+        case 'text':
+            if (node.firstChild != null && node.firstChild.nodeType == Node.TEXT_NODE) {
+                node.firstChild.nodeValue = record[2];
+            } else {
+                node.insertBefore(document.createTextNode(record[2]), node.firstChild);
+            }
+            break;
+    }
+}
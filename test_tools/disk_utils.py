@@ -10,7 +10,7 @@ from enum import Enum
 from test_tools import fs_utils
 from test_utils.size import Size, Unit
 from test_tools.dd import Dd
-import time
+from log.step_stats import sleep
 import re
 
 
@@ -133,29 +133,59 @@ def create_partition(
 
 
 def get_block_size(device):
+    return get_block_sizes([device])[0]
+
+
+def get_block_sizes(devices):
+    sysfs_paths = get_sysfs_paths(devices)
+    outputs = TestRun.executor.run_many(
+        (f"cat {sysfs_path}/queue/hw_sector_size" for sysfs_path in sysfs_paths),
+        cacheable=True)
+    return [_parse_block_size(output) for output in outputs]
+
+
+def _parse_block_size(output):
     try:
-        block_size = float(TestRun.executor.run(
-            f"cat {get_sysfs_path(device)}/queue/hw_sector_size").stdout)
+        return float(output.stdout)
     except ValueError:
-        block_size = Unit.Blocks512.value
-    return block_size
+        return Unit.Blocks512.value
 
 
 def get_size(device):
-    output = TestRun.executor.run(f"cat {get_sysfs_path(device)}/size")
-    if output.exit_code != 0:
-        TestRun.LOGGER.error(
-            f"Error while trying to get device {device} size.\n{output.stdout}\n{output.stderr}")
-    else:
-        blocks_count = int(output.stdout)
-        return blocks_count * int(get_block_size(device))
+    return get_sizes([device])[0]
+
+
+def get_sizes(devices):
+    devices = list(devices)
+    sysfs_paths = get_sysfs_paths(devices)
+    commands = []
+    for sysfs_path in sysfs_paths:
+        commands.append(f"cat {sysfs_path}/size")
+        commands.append(f"cat {sysfs_path}/queue/hw_sector_size")
+    outputs = TestRun.executor.run_many(commands, cacheable=True)
+    sizes = []
+    for device, size_output, block_size_output in zip(devices, outputs[::2], outputs[1::2]):
+        if size_output.exit_code != 0:
+            TestRun.LOGGER.error(
+                f"Error while trying to get device {device} size.\n"
+                f"{size_output.stdout}\n{size_output.stderr}")
+            sizes.append(None)
+        else:
+            blocks_count = int(size_output.stdout)
+            sizes.append(blocks_count * int(_parse_block_size(block_size_output)))
+    return sizes
 
 
 def get_sysfs_path(device):
-    sysfs_path = f"/sys/class/block/{device}"
-    if TestRun.executor.run(f"test -d {sysfs_path}").exit_code != 0:
-        sysfs_path = f"/sys/block/{device}"
-    return sysfs_path
+    return get_sysfs_paths([device])[0]
+
+
+def get_sysfs_paths(devices):
+    devices = list(devices)
+    outputs = TestRun.executor.run_many(
+        (f"test -d /sys/class/block/{device}" for device in devices), cacheable=True)
+    return [f"/sys/class/block/{device}" if output.exit_code == 0 else f"/sys/block/{device}"
+            for device, output in zip(devices, outputs)]
 
 
 def check_partition_after_create(size, part_number, parent_dev_path, part_type, aligned):
@@ -172,7 +202,7 @@ def check_partition_after_create(size, part_number, parent_dev_path, part_type,
 
     counter = 0
     while partition_path not in output and counter < 10:
-        time.sleep(2)
+        sleep(2)
         output = TestRun.executor.run(cmd).stdout
         counter += 1
 
@@ -4,10 +4,12 @@
 #
 
 import datetime
+import secrets
 
 import test_tools.fio.fio_param
 import test_tools.fs_utils
 from core.test_run import TestRun
+from test_tools.fio.fio_install_cache import FioInstallCache
 from test_tools import fs_utils
 from test_utils import os_utils
 
@@ -20,11 +22,15 @@ class Fio:
         self.executor = executor_obj if executor_obj is not None else TestRun.executor
         self.base_cmd_parameters: test_tools.fio.fio_param.FioParam = None
         self.global_cmd_parameters: test_tools.fio.fio_param.FioParam = None
+        # disabled when installation is already checked, e.g. by a sweep of many fio runs
+        self.check_installation = True
 
     def create_command(self):
         self.base_cmd_parameters = test_tools.fio.fio_param.FioParamCmd(self, self.executor)
         self.global_cmd_parameters = test_tools.fio.fio_param.FioParamConfig(self, self.executor)
-        self.fio_file = f'fio_run_{datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%s")}'
+        # fio may run in parallel, e.g. on different disks
+        self.fio_file = f'fio_run_{datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%s")}_' \
+            f'{secrets.token_hex(4)}'
         self.base_cmd_parameters\
             .set_param('eta', 'always')\
             .set_param('output-format', 'json')\
@@ -32,16 +38,27 @@ class Fio:
         return self.global_cmd_parameters
 
     def is_installed(self):
-        return self.executor.run("fio --version").stdout.strip() == self.fio_version
+        cache = FioInstallCache()
+        if cache.is_verified(self.executor, self.fio_version):
+            return True
+        installed = self.executor.run("fio --version").stdout.strip() == self.fio_version
+        if installed:
+            cache.set_verified(self.executor, self.fio_version)
+        return installed
 
     def install(self):
+        cache = FioInstallCache()
+        if cache.install_prebuilt(self.executor, self.fio_version):
+            return
         fio_url = f"http://brick.kernel.dk/snaps/{self.fio_version}.tar.bz2"
         fio_package = os_utils.download_file(fio_url)
         fs_utils.uncompress_archive(fio_package)
+        build_directory = f"{fio_package.parent_dir}/{self.fio_version}"
         TestRun.executor.run_expect_success(
-            f"cd {fio_package.parent_dir}/{self.fio_version};"
+            f"cd {build_directory};"
             f"./configure && make -j && make install"
         )
+        cache.store_prebuilt(TestRun.executor, self.fio_version, build_directory)
 
     def calculate_timeout(self):
         if self.global_cmd_parameters.get_parameter_value("time_based") is None:
@@ -54,7 +71,7 @@ class Fio:
         return datetime.timedelta(seconds=total_time)
 
     def run(self, timeout: datetime.timedelta = None):
-        if not self.is_installed():
+        if self.check_installation and not self.is_installed():
             self.install()
 
         if timeout is None:
@@ -64,7 +81,11 @@ class Fio:
             self.executor.run(f"{str(self)}-showcmd -")
             TestRun.LOGGER.info(self.executor.run(f"cat {self.fio_file}").stdout)
         TestRun.LOGGER.info(str(self))
-        return self.executor.run(str(self), timeout)
+        output = self.executor.run(str(self), timeout)
+        if output.exit_code == 127:
+            # fio removed from DUT since installation was verified
+            FioInstallCache().invalidate(self.executor)
+        return output
 
     def execution_cmd_parameters(self):
         if len(self.jobs) > 0:
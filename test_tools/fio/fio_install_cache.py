@@ -0,0 +1,106 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import datetime
+import os
+import secrets
+from threading import Lock
+
+from core.test_run import TestRun
+from test_utils.singleton import Singleton
+
+
+class FioInstallCache(metaclass=Singleton):
+    """
+    Remembers for the whole test session which DUTs have the required fio version, so it is
+    checked once per DUT instead of before every run. Fio built on a DUT is also kept as
+    a tarball on the controller, one for every fio version, kernel and architecture, which
+    is copied to other DUTs (or the same one after reinstall) instead of building fio again.
+    """
+    CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "test_framework", "fio")
+    REMOTE_DIRECTORY = "/tmp/fio_install"
+    TRANSFER_TIMEOUT = datetime.timedelta(minutes=5)
+
+    def __init__(self):
+        self._verified = {}
+        self._platforms = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def dut_id(executor):
+        return type(executor).__name__, getattr(executor, 'ip', None), \
+            getattr(executor, 'port', None)
+
+    def is_verified(self, executor, version):
+        with self._lock:
+            return self._verified.get(self.dut_id(executor)) == version
+
+    def set_verified(self, executor, version):
+        with self._lock:
+            self._verified[self.dut_id(executor)] = version
+
+    def invalidate(self, executor=None):
+        """Forgets verified installation on given DUT (by default on all of them)."""
+        with self._lock:
+            if executor is None:
+                self._verified.clear()
+            else:
+                self._verified.pop(self.dut_id(executor), None)
+
+    def tarball_path(self, executor, version):
+        kernel, arch = self.__platform(executor)
+        return os.path.join(self.CACHE_DIRECTORY, f"{version}_{kernel}_{arch}.tar.gz")
+
+    def install_prebuilt(self, executor, version):
+        """Installs fio from tarball kept on the controller, returns False if there is none."""
+        local_path = self.tarball_path(executor, version)
+        if not os.path.isfile(local_path):
+            return False
+        TestRun.LOGGER.info(f"Installing {version} built before: {local_path}")
+        remote_path = f"{self.REMOTE_DIRECTORY}/{os.path.basename(local_path)}"
+        executor.run_expect_success(f"mkdir -p {self.REMOTE_DIRECTORY}")
+        executor.rsync(local_path, remote_path, timeout=self.TRANSFER_TIMEOUT)
+        output = executor.run(f"tar -xzf {remote_path} -C / && rm -f {remote_path}")
+        if output.exit_code != 0:
+            TestRun.LOGGER.warning(f"Unable to install {version} from {local_path}.\n"
+                                   f"stderr: {output.stderr}")
+            return False
+        return True
+
+    def store_prebuilt(self, executor, version, build_directory):
+        """
+        Keeps fio built in 'build_directory' on the DUT as a tarball on the controller.
+        Fio is already installed, so failure is only logged as a warning.
+        """
+        local_path = self.tarball_path(executor, version)
+        stage = f"{self.REMOTE_DIRECTORY}/stage"
+        remote_path = f"{self.REMOTE_DIRECTORY}/{os.path.basename(local_path)}"
+        # tests run in parallel may store the same tarball
+        temporary_path = f"{local_path}.{secrets.token_hex(4)}.tmp"
+        try:
+            executor.run_expect_success(
+                f"rm -rf {stage} && mkdir -p {stage} && "
+                f"make -C {build_directory} install DESTDIR={stage} >/dev/null && "
+                f"tar -czf {remote_path} -C {stage} .")
+            os.makedirs(self.CACHE_DIRECTORY, exist_ok=True)
+            executor.rsync_from(remote_path, temporary_path, timeout=self.TRANSFER_TIMEOUT)
+            os.replace(temporary_path, local_path)
+        except Exception as e:
+            TestRun.LOGGER.warning(f"Unable to keep {version} built on DUT in {local_path}.\n"
+                                   f"{e}")
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            executor.run(f"rm -rf {self.REMOTE_DIRECTORY}")
+
+    def __platform(self, executor):
+        dut_id = self.dut_id(executor)
+        with self._lock:
+            platform = self._platforms.get(dut_id)
+        if platform is None:
+            platform = tuple(executor.run_expect_success("uname -r; uname -m").stdout.split())
+            with self._lock:
+                self._platforms[dut_id] = platform
+        return platform
@@ -0,0 +1,198 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import datetime
+import json
+from types import SimpleNamespace as Namespace
+
+from core.test_run import TestRun
+from log.step_stats import sleep
+from test_tools.fio.fio_result import FioResult
+from test_utils.size import Size, Unit
+
+
+class FioSample:
+    """
+    Fio statistics of one status interval. Bandwidth [KiB/s] and IOPS are computed from I/O
+    done in the interval, not averaged since the start like in fio reports.
+    """
+
+    def __init__(self, time_ms, interval_ms, read_kbytes, write_kbytes, read_ios, write_ios,
+                 result):
+        self.time = datetime.timedelta(milliseconds=time_ms)
+        self.interval = datetime.timedelta(milliseconds=interval_ms)
+        seconds = interval_ms / 1000 if interval_ms > 0 else float('inf')
+        self.read_bandwidth = read_kbytes / seconds
+        self.write_bandwidth = write_kbytes / seconds
+        self.read_iops = read_ios / seconds
+        self.write_iops = write_ios / seconds
+        # whole fio status report
+        self.result = result
+
+    @property
+    def bandwidth(self):
+        return self.read_bandwidth + self.write_bandwidth
+
+    def __str__(self):
+        return f"{self.time.total_seconds():.0f} s: " \
+            f"read {self.read_bandwidth:.0f} KiB/s ({self.read_iops:.0f} IOPS), " \
+            f"write {self.write_bandwidth:.0f} KiB/s ({self.write_iops:.0f} IOPS)"
+
+
+class FioLive:
+    """
+    Runs fio as a background job with JSON status reports written every 'status_interval'
+    and reads them while fio is running. samples() yields FioSample for every report, abort
+    hooks are called with each of them and may stop fio (with SIGINT, so it still writes
+    final results) by returning the reason of abort. Final results are available in
+    'results' once fio finishes.
+    """
+    POLL_INTERVAL = datetime.timedelta(seconds=1)
+    STOP_TIMEOUT = datetime.timedelta(minutes=1)
+
+    def __init__(self, fio, status_interval: datetime.timedelta = datetime.timedelta(seconds=1)):
+        self.fio = fio
+        self.executor = fio.executor
+        self.status_interval = status_interval
+        self.job = None
+        self.results = None
+        self.abort_reason = None
+        self._abort_hooks = []
+        self._decoder = json.JSONDecoder(object_hook=lambda d: Namespace(**d))
+        self._buffer = ''
+        self._reports = []
+        self._previous = None
+
+    def add_abort_hook(self, hook):
+        """Adds hook(sample) returning the reason to abort fio or None to let it run."""
+        self._abort_hooks.append(hook)
+        return self
+
+    def abort_below_bandwidth(self, min_bandwidth: Size, samples: int = 3):
+        """Aborts fio when total bandwidth is below 'min_bandwidth' per second in a row."""
+        min_kbytes = min_bandwidth.get_value(Unit.KibiByte)
+        below = []
+
+        def hook(sample):
+            below.append(sample.bandwidth < min_kbytes)
+            del below[:-samples]
+            if len(below) == samples and all(below):
+                return f"bandwidth below {min_bandwidth}/s for {samples} status intervals " \
+                    f"(last: {sample.bandwidth:.0f} KiB/s)"
+            return None
+
+        return self.add_abort_hook(hook)
+
+    def start(self):
+        if self.fio.check_installation and not self.fio.is_installed():
+            self.fio.install()
+        # reports go to stdout of the job, which is read while fio runs
+        self.fio.base_cmd_parameters\
+            .remove_param('output')\
+            .set_param('eta', 'never')\
+            .set_param('status-interval', int(self.status_interval.total_seconds()) or 1)
+        TestRun.LOGGER.info(str(self.fio))
+        self.job = self.executor.jobs.start(str(self.fio), self.fio.calculate_timeout())
+        return self
+
+    def samples(self, poll_interval: datetime.timedelta = POLL_INTERVAL):
+        """Yields samples until fio finishes. Fio is aborted when iteration is stopped."""
+        if self.job is None:
+            self.start()
+        try:
+            while True:
+                self.job.manager.poll([self.job])
+                finished = self.job.finished
+                for sample in self.__read_samples():
+                    yield sample
+                    self.__check_abort(sample)
+                if finished:
+                    break
+                sleep(poll_interval.total_seconds())
+        finally:
+            if not self.job.finished:
+                self.abort("reading of fio samples stopped")
+                self.job.wait(self.STOP_TIMEOUT)
+                self.__read_samples()
+            self.__finish()
+
+    def run(self, poll_interval: datetime.timedelta = POLL_INTERVAL):
+        """Waits for fio to finish, returns its final results (list of FioResult)."""
+        for _ in self.samples(poll_interval):
+            pass
+        return self.results
+
+    def abort(self, reason):
+        if self.abort_reason is not None or self.job.finished:
+            return
+        self.abort_reason = reason
+        TestRun.LOGGER.warning(f"Aborting fio: {reason}")
+        self.job.signal('INT')
+
+    def __check_abort(self, sample):
+        for hook in self._abort_hooks:
+            reason = hook(sample)
+            if reason:
+                self.abort(reason)
+                return
+
+    def __read_samples(self):
+        output = self.job.read_new_output()
+        if output is None:
+            return []
+        self._buffer += output.stdout
+        samples = []
+        for report in self.__decode_reports():
+            self._reports.append(report)
+            sample = self.__sample(report)
+            if sample is not None:
+                samples.append(sample)
+        return samples
+
+    def __decode_reports(self):
+        reports = []
+        while True:
+            start = self._buffer.find('{')
+            if start == -1:
+                # text between reports, e.g. fio warnings
+                self._buffer = ''
+                return reports
+            try:
+                report, end = self._decoder.raw_decode(self._buffer, start)
+            except json.JSONDecodeError:
+                # report is not written completely yet
+                self._buffer = self._buffer[start:]
+                return reports
+            reports.append(report)
+            self._buffer = self._buffer[end:]
+
+    def __sample(self, report):
+        jobs = getattr(report, 'jobs', [])
+        if not jobs:
+            return None
+        time_ms = max(getattr(job, 'job_runtime', max(job.read.runtime, job.write.runtime))
+                      for job in jobs)
+        totals = [time_ms,
+                  sum(job.read.io_kbytes for job in jobs),
+                  sum(job.write.io_kbytes for job in jobs),
+                  sum(job.read.total_ios for job in jobs),
+                  sum(job.write.total_ios for job in jobs)]
+        previous = self._previous if self._previous is not None else [0] * len(totals)
+        deltas = [total - last for total, last in zip(totals, previous)]
+        if deltas[0] <= 0:
+            # report written at the end repeats the last status report
+            return None
+        self._previous = totals
+        return FioSample(time_ms, *deltas, report)
+
+    def __finish(self):
+        if self.job.exit_code != 0 and self.abort_reason is None:
+            output = self.job.output()
+            TestRun.LOGGER.error(f"Fio exited with code {self.job.exit_code}.\n"
+                                 f"stderr: {output.stderr if output else ''}")
+        # the last report contains final results
+        final = self._reports[-1] if self._reports else Namespace()
+        self.results = [FioResult(final, job) for job in getattr(final, 'jobs', [])]
+        self.job.remove()
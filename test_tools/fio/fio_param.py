@@ -254,14 +254,23 @@ class FioParam(LinuxCommand):
     def edit_global(self):
         return self.fio.global_cmd_parameters
 
-    def run(self):
+    def __set_reporting_params(self):
         self.fio.base_cmd_parameters.set_param("group_reporting")
         if "per_job_logs" in self.fio.global_cmd_parameters.command_param_dict.keys():
             self.fio.global_cmd_parameters.set_param("per_job_logs", '0')
+
+    def run(self):
+        self.__set_reporting_params()
         self.fio.run()
         output = self.command_executor.run(f"cat {self.fio.fio_file}")
         return self.get_results(output.stdout)
 
+    def run_live(self, status_interval: datetime.timedelta = datetime.timedelta(seconds=1)):
+        """Starts fio in background, returns FioLive reading its status reports."""
+        from test_tools.fio.fio_live import FioLive
+        self.__set_reporting_params()
+        return FioLive(self.fio, status_interval).start()
+
     @staticmethod
     def get_results(result):
         data = json.loads(result, object_hook=lambda d: Namespace(**d))
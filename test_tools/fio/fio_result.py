@@ -3,6 +3,10 @@
 # SPDX-License-Identifier: BSD-3-Clause-Clear
 #
 
+from types import SimpleNamespace as Namespace
+
+import numpy as np
+
 
 class FioResult:
     def __init__(self, result, job):
@@ -18,6 +22,8 @@ class FioResult:
             "Read IOPS": self.read_iops(),
             "Read runtime [ms]": self.read_runtime(),
             "Read average completion latency [us]": self.read_completion_latency_average(),
+            "Read completion latency p99 [us]": self.read_completion_latency_percentile(99),
+            "Read completion latency p99.9 [us]": self.read_completion_latency_percentile(99.9),
             "Total write I/O [KiB]": self.write_io(),
             "Total write bandwidth [KiB/s]": self.write_bandwidth(),
             "Write bandwidth average [KiB/s]": self.write_bandwidth_average(),
@@ -25,6 +31,9 @@ class FioResult:
             "Write IOPS": self.write_iops(),
             "Write runtime [ms]": self.write_runtime(),
             "Write average completion latency [us]": self.write_completion_latency_average(),
+            "Write completion latency p99 [us]": self.write_completion_latency_percentile(99),
+            "Write completion latency p99.9 [us]":
+                self.write_completion_latency_percentile(99.9),
         }
 
         disks_name = self.disks_name()
@@ -91,3 +100,129 @@ class FioResult:
 
     def write_completion_latency_average(self):
         return self.job.write.clat_ns.mean / 1000
+
+    def read_completion_latency_percentile(self, percentile):
+        return self.latency_percentiles([percentile], "read")[percentile]
+
+    def write_completion_latency_percentile(self, percentile):
+        return self.latency_percentiles([percentile], "write")[percentile]
+
+    def read_submission_latency_average(self):
+        return self.job.read.slat_ns.mean / 1000
+
+    def write_submission_latency_average(self):
+        return self.job.write.slat_ns.mean / 1000
+
+    def read_total_latency_average(self):
+        return self.job.read.lat_ns.mean / 1000
+
+    def write_total_latency_average(self):
+        return self.job.write.lat_ns.mean / 1000
+
+    def read_total_latency_percentile(self, percentile):
+        return self.latency_percentiles([percentile], "read", "lat_ns")[percentile]
+
+    def write_total_latency_percentile(self, percentile):
+        return self.latency_percentiles([percentile], "write", "lat_ns")[percentile]
+
+    def latency_percentiles(self, percentiles, direction="read", latency="clat_ns"):
+        """Returns {percentile: latency [us]}, see merge_latency_percentiles()."""
+        return merge_latency_percentiles([self], percentiles, direction, latency)
+
+    def latency_buckets(self):
+        """
+        Returns {bucket upper bound [us]: percentage of I/Os} of both directions, as reported
+        by fio in latency_ns, latency_us and latency_ms. The last bucket bound is infinity.
+        """
+        buckets = {}
+        for name, scale in (("latency_ns", 1 / 1000), ("latency_us", 1), ("latency_ms", 1000)):
+            for bound, percentage in vars(getattr(self.job, name, None) or Namespace()).items():
+                bound = float("inf") if bound.startswith(">=") else float(bound) * scale
+                buckets[bound] = buckets.get(bound, 0) + percentage
+        return dict(sorted(buckets.items()))
+
+
+def merge_latency_percentiles(results, percentiles, direction="read", latency="clat_ns"):
+    """
+    Returns {percentile: latency [us]} of I/Os of all given results (e.g. jobs run without
+    group_reporting). Latency histograms ('bins', in json+ output) are merged exactly when all
+    jobs have them. Otherwise distributions of jobs are interpolated linearly between latencies
+    of reported percentiles and weighted by I/O counts of jobs. Latency reported for many
+    percentiles is a step of the distribution, so percentiles of a single job are exactly as
+    reported by fio. Percentiles are nan if there were no I/Os.
+    """
+    jobs = []
+    for result in results:
+        stats = getattr(result.job, direction)
+        if getattr(stats, "total_ios", 1) > 0 and hasattr(stats, latency):
+            jobs.append((getattr(stats, latency), getattr(stats, "total_ios", 1)))
+    percentiles = list(percentiles)
+    if jobs and all(hasattr(stats, "bins") for stats, _ in jobs):
+        latencies = _merge_histograms([stats.bins for stats, _ in jobs], percentiles)
+    else:
+        jobs = [(stats.percentile, ios) for stats, ios in jobs if hasattr(stats, "percentile")]
+        latencies = _merge_percentile_maps(jobs, percentiles) if jobs \
+            else [float("nan")] * len(percentiles)
+    return {percentile: latency / 1000 for percentile, latency in zip(percentiles, latencies)}
+
+
+def _merge_histograms(histograms, percentiles):
+    values, counts = [], []
+    for histogram in histograms:
+        items = vars(histogram).items()
+        values.append(np.fromiter((float(value) for value, _ in items), float, len(items)))
+        counts.append(np.fromiter((count for _, count in items), float, len(items)))
+    values = np.concatenate(values)
+    order = np.argsort(values, kind="stable")
+    values = values[order]
+    cdf = np.cumsum(np.concatenate(counts)[order])
+    if len(cdf) == 0 or cdf[-1] == 0:
+        return [float("nan")] * len(percentiles)
+    indices = np.searchsorted(cdf * (100 / cdf[-1]), np.asarray(percentiles, dtype=float))
+    return values[np.minimum(indices, len(values) - 1)].tolist()
+
+
+def _merge_percentile_maps(jobs, percentiles):
+    distributions = []
+    for percentile_map, ios in jobs:
+        items = sorted((float(percentile), float(value))
+                       for percentile, value in vars(percentile_map).items())
+        distributions.append((np.array([value for _, value in items]),
+                              np.array([percentile for percentile, _ in items]), ios))
+    if len(distributions) == 1:
+        values, cdf, _ = distributions[0]
+    else:
+        grid = np.unique(np.concatenate([values for values, _, _ in distributions]))
+        # cdf just below and at each latency, they differ for latencies of reported percentiles
+        below, at = np.zeros(len(grid)), np.zeros(len(grid))
+        for job_values, job_percentiles, ios in distributions:
+            below += ios * _job_cdf(job_values, job_percentiles, grid, "left")
+            at += ios * _job_cdf(job_values, job_percentiles, grid, "right")
+        total_ios = sum(ios for _, _, ios in distributions)
+        values = np.repeat(grid, 2)
+        cdf = np.column_stack((below, at)).ravel() / total_ios
+    return _inverse_cdf(values, cdf, np.asarray(percentiles, dtype=float))
+
+
+def _job_cdf(values, percentiles, latencies, side):
+    # linear between the highest percentile of a latency and the lowest one of the next latency
+    upper = np.searchsorted(values, latencies, side)
+    lower = np.maximum(upper - 1, 0)
+    upper = np.minimum(upper, len(values) - 1)
+    span = values[upper] - values[lower]
+    fraction = np.divide(latencies - values[lower], span, out=np.ones(len(latencies)),
+                         where=span > 0)
+    cdf = percentiles[lower] + np.clip(fraction, 0, 1) * (percentiles[upper] - percentiles[lower])
+    return np.where(latencies < values[0], 0.0, cdf)
+
+
+def _inverse_cdf(values, cdf, percentiles, tolerance=1e-9):
+    upper = np.minimum(np.searchsorted(cdf, percentiles - tolerance), len(cdf) - 1)
+    lower = np.maximum(upper - 1, 0)
+    span = cdf[upper] - cdf[lower]
+    fraction = np.divide(percentiles - cdf[lower], span, out=np.ones(len(percentiles)),
+                         where=span > 0)
+    # percentile reached at a latency (e.g. reported by fio) gives this latency exactly
+    fraction = np.where(cdf[upper] <= percentiles + tolerance, 1.0, np.clip(fraction, 0, 1))
+    return np.where(fraction == 1.0, values[upper],
+                    values[lower] + fraction * (values[upper] - values[lower])).tolist()
@@ -0,0 +1,205 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import numpy as np
+
+from test_tools.fio.fio_result import FioResult
+
+
+class FioResultStore:
+    """
+    Results of many fio runs kept as columns of numbers instead of trees of parsed fio
+    output. Every job result is one row with its metrics (bandwidth [KiB/s], IOPS, runtime
+    [ms], mean submission, completion and total latency and completion latency percentiles
+    [us], errors), fio job options (e.g. 'bs', 'iodepth', 'rw') and labels given when
+    results are added. Utilization of disks is kept in a separate table, its 'row' column
+    points to the job result row. Rows are appended to lists, which are turned into numpy
+    arrays on the first access. Loaded and selected stores keep their columns as arrays.
+    """
+    DIRECTIONS = ("read", "write")
+    PERCENTILES = (50, 90, 99, 99.9, 99.99)
+    DISK_COLUMNS = ("row", "name", "util", "read_ios", "write_ios")
+
+    def __init__(self):
+        self._rows = 0
+        self._columns = {}
+        self._disks = {name: [] for name in self.DISK_COLUMNS}
+        self._arrays = None
+        self._disk_arrays = None
+
+    @staticmethod
+    def metric_columns():
+        columns = []
+        for direction in FioResultStore.DIRECTIONS:
+            columns += [f"{direction}_{metric}" for metric in
+                        ("bw", "iops", "io_kbytes", "runtime", "slat_mean", "clat_mean",
+                         "lat_mean")]
+            columns += [f"{direction}_clat_p{percentile:g}"
+                        for percentile in FioResultStore.PERCENTILES]
+        return columns + ["errors"]
+
+    def add(self, results, **labels):
+        """Adds list of FioResult (e.g. returned by FioParam.run()) described by labels."""
+        disks = self.__as_lists(self._disks)
+        for result in results:
+            row = self.__metrics(result)
+            row.update(self.__job_options(result))
+            row.update(labels)
+            self.__append(row)
+            for disk in getattr(result.result, 'disk_util', []):
+                disks["row"].append(self._rows - 1)
+                disks["name"].append(disk.name)
+                disks["util"].append(float(getattr(disk, 'util', np.nan)))
+                disks["read_ios"].append(int(getattr(disk, 'read_ios', 0)))
+                disks["write_ios"].append(int(getattr(disk, 'write_ios', 0)))
+        self._arrays = self._disk_arrays = None
+        return self
+
+    def __len__(self):
+        return self._rows
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def column(self, name):
+        return self.__get_arrays()[name]
+
+    def disk_column(self, name):
+        if self._disk_arrays is None:
+            self._disk_arrays = self.__to_arrays(self._disks)
+        return self._disk_arrays[name]
+
+    def where(self, **values):
+        """Returns store with rows which have given values in given columns."""
+        mask = np.ones(self._rows, dtype=bool)
+        for name, value in values.items():
+            mask &= self.column(name) == value
+        return self.__select(np.flatnonzero(mask))
+
+    def group_by(self, *keys, columns=None, aggregate=np.mean):
+        """
+        Returns {key values: {column: aggregated value}} for rows grouped by values in 'keys'
+        columns. By default metric columns are averaged.
+        """
+        if columns is None:
+            columns = [name for name in self.metric_columns() if name in self._columns]
+        if self._rows == 0:
+            return {}
+        codes = np.zeros(self._rows, dtype=np.int64)
+        uniques = []
+        for key in keys:
+            values, inverse = np.unique(self.column(key), return_inverse=True)
+            codes = codes * len(values) + inverse.reshape(-1)
+            uniques.append(values)
+        groups, inverse = np.unique(codes, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        group_keys = []
+        for group in groups.tolist():
+            key = []
+            for key_values in reversed(uniques):
+                group, index = divmod(group, len(key_values))
+                key.insert(0, key_values[index].item())
+            group_keys.append(tuple(key))
+        order = np.argsort(inverse, kind="stable")
+        splits = np.cumsum(np.bincount(inverse))[:-1]
+        grouped = {key: {} for key in group_keys}
+        for name in columns:
+            values = self.column(name)[order]
+            for key, group_values in zip(group_keys, np.split(values, splits)):
+                grouped[key][name] = np.asarray(aggregate(group_values)).item()
+        return grouped
+
+    def save(self, path):
+        """Saves store to a compressed .npz file."""
+        arrays = {f"rows/{name}": array for name, array in self.__get_arrays().items()}
+        arrays.update({f"disks/{name}": self.disk_column(name) for name in self.DISK_COLUMNS})
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        with np.load(path, allow_pickle=False) as data:
+            for key in data.files:
+                table, name = key.split("/", 1)
+                values = data[key]
+                if table == "rows":
+                    store._columns[name] = values
+                    store._rows = len(values)
+                else:
+                    store._disks[name] = values
+        return store
+
+    def __metrics(self, result: FioResult):
+        row = {}
+        for direction in self.DIRECTIONS:
+            stats = getattr(result.job, direction)
+            row[f"{direction}_bw"] = float(stats.bw)
+            row[f"{direction}_iops"] = float(stats.iops)
+            row[f"{direction}_io_kbytes"] = int(stats.io_kbytes)
+            row[f"{direction}_runtime"] = int(stats.runtime)
+            for latency in ("slat", "clat", "lat"):
+                row[f"{direction}_{latency}_mean"] = getattr(stats, f"{latency}_ns").mean / 1000
+            percentiles = result.latency_percentiles(self.PERCENTILES, direction)
+            for percentile, value in percentiles.items():
+                row[f"{direction}_clat_p{percentile:g}"] = value
+        row["errors"] = int(result.total_errors())
+        return row
+
+    @staticmethod
+    def __job_options(result: FioResult):
+        options = {}
+        for source, name in ((result.result, 'global options'), (result.job, 'job options')):
+            if hasattr(source, name):
+                options.update(vars(getattr(source, name)))
+        options["jobname"] = getattr(result.job, 'jobname', '')
+        return options
+
+    def __append(self, row):
+        for name in row:
+            if name not in self._columns:
+                self._columns[name] = [None] * self._rows
+        for name, values in self.__as_lists(self._columns).items():
+            values.append(row.get(name))
+        self._rows += 1
+
+    def __select(self, indices):
+        store = FioResultStore()
+        store._rows = len(indices)
+        store._columns = {name: array[indices] for name, array in self.__get_arrays().items()}
+        disk_rows = self.disk_column("row")
+        disk_indices = np.flatnonzero(np.isin(disk_rows, indices))
+        store._disks = {name: self.disk_column(name)[disk_indices]
+                        for name in self.DISK_COLUMNS}
+        store._disks["row"] = np.searchsorted(indices, disk_rows[disk_indices])
+        return store
+
+    def __get_arrays(self):
+        if self._arrays is None:
+            self._arrays = self.__to_arrays(self._columns)
+        return self._arrays
+
+    @staticmethod
+    def __as_lists(table):
+        # columns of loaded or selected store are arrays, rows are appended to lists
+        for name, values in table.items():
+            if isinstance(values, np.ndarray):
+                table[name] = values.tolist()
+        return table
+
+    @staticmethod
+    def __to_arrays(table):
+        return {name: values if isinstance(values, np.ndarray)
+                else FioResultStore.__to_array(values) for name, values in table.items()}
+
+    @staticmethod
+    def __to_array(values):
+        if any(value is None for value in values):
+            # column missing in some rows, e.g. option set only for some runs
+            if all(isinstance(value, (int, float)) or value is None for value in values):
+                return np.array([np.nan if value is None else value for value in values],
+                                dtype=float)
+            return np.array(['' if value is None else str(value) for value in values])
+        return np.asarray(values)
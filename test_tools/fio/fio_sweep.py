@@ -0,0 +1,139 @@
+#
+# Copyright(c) 2019 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause-Clear
+#
+
+import datetime
+import itertools
+import os
+from enum import Enum
+from queue import Queue
+from threading import Lock
+
+from core.test_run import TestRun
+from test_tools.fio.fio import Fio
+from test_tools.fio.fio_param import FioParamConfig
+from test_tools.fio.fio_result_store import FioResultStore
+from test_utils.size import Size, Unit
+
+
+class FioSweep:
+    """
+    Runs fio for every combination of values of parameter axes, e.g.
+    {'block_size': [Size(4, Unit.KibiByte), Size(1, Unit.MebiByte)], 'io_depth': [1, 32]}.
+    Axis names are FioParam methods, 'configure' is called with FioParamConfig of each point
+    to set common parameters (e.g. direct, run_time). Points run in parallel, each one on
+    a disk not used by other running points, as iterations of the test log. Results are
+    stored in FioResultStore with a column for every axis and 'disk' column. If a checkpoint
+    file is given, results are saved to it after every point and points already saved there
+    are not run again, so an interrupted sweep is resumed.
+    """
+
+    def __init__(self, disks: list = None, axes: dict = None, configure=None,
+                 checkpoint_path: str = None, executor=None):
+        self.disks = list(disks) if disks is not None else list(TestRun.dut.disks)
+        self.axes = dict(axes or {})
+        self.configure = configure
+        self.checkpoint_path = checkpoint_path
+        self.executor = executor if executor is not None else TestRun.executor
+        self.store = None
+        self._lock = Lock()
+        for name in self.axes:
+            if not callable(getattr(FioParamConfig, name, None)):
+                raise ValueError(f"Unknown fio parameter '{name}'.")
+
+    def points(self):
+        """Returns list of parameter dicts, one for every combination of axes values."""
+        names = list(self.axes)
+        return [dict(zip(names, values)) for values in itertools.product(*self.axes.values())]
+
+    def run(self):
+        """Runs points not saved in checkpoint yet, returns FioResultStore of all points."""
+        if not self.disks:
+            raise ValueError("No disks to run fio sweep on.")
+        self.store = self.__load_checkpoint()
+        done = self.__done_points()
+        points = [point for point in self.points() if self.__labels(point) not in done]
+        TestRun.LOGGER.info(f"Fio sweep: {len(points)} of {len(self.points())} points to run "
+                            f"on {len(self.disks)} disks")
+        if not points:
+            return self.store
+
+        fio = Fio(self.executor)
+        if not fio.is_installed():
+            fio.install()
+        free_disks = Queue()
+        for disk in self.disks:
+            free_disks.put(disk)
+
+        def run_point(point):
+            disk = free_disks.get()
+            try:
+                self.__run_point(point, disk)
+            finally:
+                free_disks.put(disk)
+
+        TestRun.LOGGER.run_parallel_iterations(
+            {self.__title(point): (lambda point=point: run_point(point)) for point in points},
+            max_workers=len(self.disks))
+        return self.store
+
+    def __run_point(self, point, disk):
+        TestRun.LOGGER.info(f"Disk: {disk.system_path}")
+        fio = Fio(self.executor)
+        fio.check_installation = False
+        parameters = fio.create_command().file_name(disk.system_path)
+        if self.configure is not None:
+            self.configure(parameters)
+        for name, value in point.items():
+            getattr(parameters, name)(value)
+        results = parameters.run()
+        for result in results:
+            TestRun.LOGGER.info(str(result))
+        with self._lock:
+            self.store.add(results, disk=disk.system_path, **self.__labels_dict(point))
+            self.__save_checkpoint()
+
+    def __load_checkpoint(self):
+        if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+            store = FioResultStore.load(self.checkpoint_path)
+            TestRun.LOGGER.info(f"Fio sweep resumed from {self.checkpoint_path}: "
+                                f"{len(store)} results")
+            return store
+        return FioResultStore()
+
+    def __save_checkpoint(self):
+        if self.checkpoint_path is None:
+            return
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, "wb") as checkpoint:
+            self.store.save(checkpoint)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def __done_points(self):
+        if len(self.store) == 0 or any(name not in self.store.columns for name in self.axes):
+            return set()
+        columns = [self.store.column(name).tolist() for name in self.axes]
+        return set(zip(*columns))
+
+    def __labels(self, point):
+        return tuple(self.__labels_dict(point).values())
+
+    def __labels_dict(self, point):
+        return {name: label(value) for name, value in point.items()}
+
+    def __title(self, point):
+        return ", ".join(f"{name}={label(value)}" for name, value in point.items())
+
+
+def label(value):
+    """Value of fio parameter as stored in result columns."""
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, Size):
+        return int(value.get_value(Unit.Byte))
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
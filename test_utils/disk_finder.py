@@ -25,12 +25,24 @@ def find_disks():
     return devices_result
 
 
-def get_command_output(command, check_exit_code=True):
-    output = TestRun.executor.run(command)
+def get_command_output(command, check_exit_code=True, cacheable=None):
+    output = TestRun.executor.run(command, cacheable=cacheable)
+    check_command_output(command, output, check_exit_code)
+    return output.stdout
+
+
+def get_commands_output(commands, check_exit_code=True):
+    commands = list(commands)
+    outputs = TestRun.executor.run_many(commands)
+    for command, output in zip(commands, outputs):
+        check_command_output(command, output, check_exit_code)
+    return [output.stdout for output in outputs]
+
+
+def check_command_output(command, output, check_exit_code=True):
     if check_exit_code and output.exit_code != 0:
         raise Exception(f"Command '{command}' returned non-zero status ({output.exit_code})! "
                         f"{output.stderr}\n{output.stdout}")
-    return output.stdout
 
 
 def get_block_devices_list(block_devices):
@@ -43,8 +55,15 @@ def get_block_devices_list(block_devices):
 
 
 def discover_hdd_devices(block_devices, devices_res):
-    for dev in block_devices:
-        block_size = disk_utils.get_block_size(dev)
+    serial_numbers = get_serial_numbers(block_devices)
+    block_sizes = disk_utils.get_block_sizes(block_devices)
+    sizes = disk_utils.get_sizes(block_devices)
+    for dev, serial_number, block_size, size in zip(
+            block_devices, serial_numbers, block_sizes, sizes):
+        if serial_number is None:
+            TestRun.LOGGER.warning(f"Unable to read serial number of /dev/{dev}, "
+                                   f"disk is skipped.")
+            continue
         if int(block_size) == 4096:
             disk_type = 'hdd4k'
         else:
@@ -52,52 +71,71 @@ def discover_hdd_devices(block_devices, devices_res):
         devices_res.append({
             "type": disk_type,
             "path": f"/dev/{dev}",
-            "serial": get_command_output(
-                f"sg_inq /dev/{dev} | grep 'Unit serial number'").split(': ')[1].strip(),
+            "serial": serial_number,
             "blocksize": block_size,
-            "size": disk_utils.get_size(dev)})
+            "size": size})
     block_devices.clear()
 
 
 # This method discovers only Intel SSD devices
 def discover_ssd_devices(block_devices, devices_res):
     ssd_count = int(get_command_output('isdct show -intelssd | grep DevicePath | wc -l'))
+    commands = []
     for i in range(0, ssd_count):
-        device_path = get_command_output(f"isdct show -intelssd {i} | grep DevicePath").split()[2]
+        commands.append(f"isdct show -intelssd {i} | grep DevicePath")
+        commands.append(f"isdct show -intelssd {i} | grep SerialNumber")
+        commands.append(f"isdct show -intelssd {i} | grep Optane")
+    outputs = TestRun.executor.run_many(commands)
+
+    sata_serial_numbers = None
+    ssd_devices = []
+    for i in range(0, ssd_count):
+        path_output, serial_output, optane_output = outputs[3 * i:3 * i + 3]
+        check_command_output(commands[3 * i], path_output)
+        check_command_output(commands[3 * i + 1], serial_output)
+        device_path = path_output.stdout.split()[2]
         dev = device_path.replace('/dev/', '')
-        serial_number = get_command_output(
-            f"isdct show -intelssd {i} | grep SerialNumber").split()[2].strip()
+        serial_number = serial_output.stdout.split()[2].strip()
         if 'nvme' not in device_path:
             disk_type = 'sata'
-            dev = find_sata_ssd_device_path(serial_number, block_devices)
+            if sata_serial_numbers is None:
+                sata_serial_numbers = {
+                    serial: block_device for serial, block_device
+                    in zip(get_serial_numbers(block_devices), block_devices)
+                    if serial is not None}
+            dev = sata_serial_numbers.get(serial_number)
             if dev is None:
                 continue
             if "sg" in device_path:
                 device_path = f"/dev/{dev}"
-        elif TestRun.executor.run(
-                f"isdct show -intelssd {i} | grep Optane").exit_code == 0:
+        elif optane_output.exit_code == 0:
             disk_type = 'optane'
         else:
             disk_type = 'nand'
+        ssd_devices.append((dev, disk_type, device_path, serial_number))
 
+    devs = [dev for dev, _, _, _ in ssd_devices]
+    block_sizes = disk_utils.get_block_sizes(devs)
+    sizes = disk_utils.get_sizes(devs)
+    for (dev, disk_type, device_path, serial_number), block_size, size in zip(
+            ssd_devices, block_sizes, sizes):
         devices_res.append({
             "type": disk_type,
             "path": device_path,
             "serial": serial_number,
-            "blocksize": disk_utils.get_block_size(dev),
-            "size": disk_utils.get_size(dev)})
+            "blocksize": block_size,
+            "size": size})
         block_devices.remove(dev)
 
 
-def find_sata_ssd_device_path(serial_number, block_devices):
-    for dev in block_devices:
-        dev_serial = get_command_output(
-            f"sg_inq /dev/{dev} | grep 'Unit serial number'").split(': ')[1].strip()
-        if dev_serial == serial_number:
-            return dev
-    return None
+def get_serial_numbers(devices):
+    """Returns serial number of each device, None if it cannot be read."""
+    # failure of one device must not fail the whole batch
+    outputs = get_commands_output(
+        f"sg_inq /dev/{dev} | grep 'Unit serial number' || true" for dev in devices)
+    return [output.split(': ')[1].strip() if ': ' in output else None for output in outputs]
 
 
 def get_system_disk():
-    system_partition = get_command_output('mount | grep " / "').split()[0]
-    return get_command_output(f'lsblk -no pkname {system_partition}')
+    system_partition = get_command_output('mount | grep " / "', cacheable=True).split()[0]
+    return get_command_output(f'lsblk -no pkname {system_partition}', cacheable=True)
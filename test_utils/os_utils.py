@@ -8,6 +8,7 @@ import time
 from aenum import IntFlag, Enum
 
 from core.test_run import TestRun
+from log.step_stats import sleep
 from test_utils.filesystem.file import File
 
 
@@ -78,7 +79,7 @@ def unload_kernel_module(module_name, unload_method: ModuleRemoveMethod = Module
 
 def reload_kernel_module(module_name, module_args: {str, str}=None):
     unload_kernel_module(module_name)
-    time.sleep(1)
+    sleep(1)
     load_kernel_module(module_name, module_args)
 
 
@@ -90,7 +91,7 @@ def wait(predicate, timeout, interval=None):
         if result:
             break
         if interval is not None:
-            time.sleep(interval)
+            sleep(interval)
     return result
 
 
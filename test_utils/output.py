@@ -3,6 +3,9 @@
 # SPDX-License-Identifier: BSD-3-Clause-Clear
 #
 
+import codecs
+from collections import deque
+
 
 class Output:
     def __init__(self, output_out, output_err, return_code):
@@ -11,3 +14,100 @@ class Output:
         self.stderr = output_err.decode('utf-8').rstrip() if type(output_err) == bytes else \
             output_err
         self.exit_code = return_code
+
+
+class OutputStream:
+    """
+    Iterable over output of a running command. Yields (source, text) tuples, where source is
+    'stdout' or 'stderr' and text is a decoded line (or a decoded chunk when chunks=True).
+    Only the last 'buffer_size' lines (or chunks) of each stream are kept, they are used
+    to build the final Output available as 'output' once the command finishes.
+    Stream should be used as 'with executor.run_stream(...) as stream:', so the command is
+    stopped and its resources (e.g. SSH channel) are released also when iteration over
+    the stream is stopped early. Output of such command has no exit code.
+    """
+
+    def __init__(self, data, buffer_size: int = 1000, chunks: bool = False,
+                 on_data=None, on_finish=None):
+        self._data = data
+        self._chunks = chunks
+        self._on_data = on_data
+        self._on_finish = on_finish
+        self._buffers = {source: deque(maxlen=buffer_size) for source in ('stdout', 'stderr')}
+        self._decoders = {source: codecs.getincrementaldecoder('utf-8')(errors='replace')
+                          for source in self._buffers}
+        self._pending = {source: '' for source in self._buffers}
+        self.dropped = {'stdout': 0, 'stderr': 0}
+        self.output = None
+
+    def __iter__(self):
+        if self.output is not None:
+            return
+        try:
+            yield from self.__read()
+        except GeneratorExit:
+            # iteration stopped early, e.g. by break
+            self.close()
+            raise
+
+    def __read(self):
+        decoders, pending = self._decoders, self._pending
+        while True:
+            try:
+                source, data = next(self._data)
+            except StopIteration as finished:
+                exit_code = finished.value
+                break
+            text = decoders[source].decode(data)
+            if self._chunks:
+                if text:
+                    yield from self.__emit(source, text)
+                continue
+            lines = (pending[source] + text).split('\n')
+            pending[source] = lines.pop()
+            for line in lines:
+                yield from self.__emit(source, line)
+
+        for source, decoder in decoders.items():
+            text = pending[source] + decoder.decode(b'', final=True)
+            if text:
+                yield from self.__emit(source, text)
+        self.__finish(exit_code)
+
+    def __finish(self, exit_code):
+        separator = '' if self._chunks else '\n'
+        self.output = Output(separator.join(self._buffers['stdout']).rstrip(),
+                             separator.join(self._buffers['stderr']).rstrip(),
+                             exit_code)
+        if self._on_finish is not None:
+            self._on_finish(self.output)
+
+    def close(self):
+        """Stops the command if it is still running, 'output' keeps output read so far."""
+        if self.output is not None:
+            return
+        self._data.close()
+        self.__finish(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def __emit(self, source, text):
+        buffer = self._buffers[source]
+        if len(buffer) == buffer.maxlen:
+            self.dropped[source] += 1
+        buffer.append(text)
+        if self._on_data is not None:
+            self._on_data(source, text)
+        yield source, text
+
+    def wait(self):
+        for _ in self:
+            pass
+        return self.output